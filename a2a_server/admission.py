@@ -0,0 +1,155 @@
+import asyncio
+import math
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+# Assumed duration of a task until the first ones have finished
+DEFAULT_SERVICE_SECONDS = 5.0
+# Recent queue waits kept for the percentiles in `stats`
+WAIT_SAMPLES = 1000
+
+
+def _percentile(samples: list[float], fraction: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class AdmissionRejected(Exception):
+    """Raised when a task cannot be admitted; the caller should retry later."""
+
+    def __init__(self, reason: str, retry_after_seconds: int):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after_seconds = retry_after_seconds
+
+
+class AdmissionController:
+    """Limits how many tasks run at once, with a bounded queue in front.
+
+    At most `max_concurrency` tasks hold a slot. Up to `max_queue` more wait for
+    one, each for at most `queue_timeout_seconds`. Beyond that, tasks are
+    rejected straight away with a retry hint estimated from recent task durations.
+    """
+
+    def __init__(self, max_concurrency: int = 8, max_queue: int = 32, queue_timeout_seconds: float = 30.0):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout_seconds = queue_timeout_seconds
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self.active = 0
+        self.queued = 0
+        self.max_queue_depth = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self._service_seconds = DEFAULT_SERVICE_SECONDS
+        self._waits: deque[float] = deque(maxlen=WAIT_SAMPLES)
+
+    def retry_after(self) -> int:
+        """Seconds until a slot is likely to be free for a new task."""
+        backlog = self.queued + 1
+        return max(1, math.ceil(self._service_seconds * backlog / self.max_concurrency))
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[float]:
+        """Holds a slot for the duration of the block and yields the seconds waited for it."""
+        if self.active >= self.max_concurrency and self.queued >= self.max_queue:
+            self.rejected += 1
+            raise AdmissionRejected('queue full', self.retry_after())
+        self.queued += 1
+        self.max_queue_depth = max(self.max_queue_depth, self.queued)
+        started = time.monotonic()
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), self.queue_timeout_seconds)
+        except TimeoutError:
+            self.rejected += 1
+            self.timed_out += 1
+            raise AdmissionRejected('queue timeout', self.retry_after()) from None
+        finally:
+            self.queued -= 1
+        waited = time.monotonic() - started
+        self._waits.append(waited)
+        self.admitted += 1
+        self.active += 1
+        admitted_at = time.monotonic()
+        try:
+            yield waited
+        finally:
+            self.active -= 1
+            self._semaphore.release()
+            # Exponential moving average of how long a task holds its slot
+            self._service_seconds = 0.8 * self._service_seconds + 0.2 * (time.monotonic() - admitted_at)
+
+    def stats(self) -> dict:
+        waits = list(self._waits)
+        return {
+            'active': self.active,
+            'queued': self.queued,
+            'max_concurrency': self.max_concurrency,
+            'max_queue': self.max_queue,
+            'max_queue_depth': self.max_queue_depth,
+            'admitted': self.admitted,
+            'rejected': self.rejected,
+            'timed_out': self.timed_out,
+            'wait_p50_seconds': round(_percentile(waits, 0.5), 4),
+            'wait_p95_seconds': round(_percentile(waits, 0.95), 4),
+            'wait_max_seconds': round(max(waits, default=0.0), 4),
+            'avg_task_seconds': round(self._service_seconds, 3),
+        }
+
+
+class TokenBucket:
+    """An async token bucket: `rate_per_minute` tokens a minute, bursts of up to `capacity`.
+
+    Callers wait their turn in arrival order rather than failing, so model calls
+    are spread out to stay within the quota instead of erroring past it.
+    """
+
+    def __init__(self, rate_per_minute: float, capacity: int | None = None):
+        self.rate_per_second = rate_per_minute / 60.0
+        self.capacity = capacity if capacity is not None else max(1, int(rate_per_minute // 60))
+        self._tokens = float(self.capacity)
+        self._updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+        self.acquired = 0
+        self.throttled = 0
+        self.waiting = 0
+        self.wait_seconds_total = 0.0
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate_per_second)
+        self._updated_at = now
+
+    async def acquire(self) -> float:
+        """Takes a token, waiting for one if needed, and returns the seconds waited."""
+        started = time.monotonic()
+        self.waiting += 1
+        try:
+            async with self._lock:
+                self._refill()
+                if self._tokens < 1:
+                    self.throttled += 1
+                    await asyncio.sleep((1 - self._tokens) / self.rate_per_second)
+                    self._refill()
+                self._tokens -= 1
+        finally:
+            self.waiting -= 1
+        waited = time.monotonic() - started
+        self.acquired += 1
+        self.wait_seconds_total += waited
+        return waited
+
+    def stats(self) -> dict:
+        return {
+            'rate_per_minute': round(self.rate_per_second * 60, 3),
+            'capacity': self.capacity,
+            'acquired': self.acquired,
+            'throttled': self.throttled,
+            'waiting': self.waiting,
+            'wait_seconds_total': round(self.wait_seconds_total, 3),
+        }
@@ -0,0 +1,87 @@
+import json
+import os
+import zlib
+
+CONTEXT_ID_HEADER = b'x-a2a-context-id'
+AFFINITY_HEADER = b'x-a2a-affinity-key'
+WORKER_HEADER = b'x-a2a-worker'
+# Number of buckets context IDs are hashed into for the affinity key
+AFFINITY_BUCKETS = int(os.getenv('AFFINITY_BUCKETS', 64))
+
+
+def affinity_key(context_id: str) -> str:
+    """A stable bucket for a context ID, suitable for consistent-hash routing."""
+    return str(zlib.crc32(context_id.encode('utf-8')) % AFFINITY_BUCKETS)
+
+
+def _context_id(body: bytes) -> str | None:
+    try:
+        request = json.loads(body)
+    except ValueError:
+        return None
+    if not isinstance(request, dict):
+        return None
+    params = request.get('params')
+    message = params.get('message') if isinstance(params, dict) else None
+    if not isinstance(message, dict):
+        return None
+    context_id = message.get('contextId')
+    return context_id if isinstance(context_id, str) else None
+
+
+class ContextAffinityMiddleware:
+    """Adds context-affinity hints to the responses of A2A JSON-RPC requests.
+
+    Responses to messages sent in an existing context carry the context ID, a
+    stable affinity key derived from it and the worker that served them, so a
+    load balancer or client can keep a conversation on one worker or replica.
+
+    Messages can be served by any worker from the shared stores, but a running
+    task's event queue and model run live only in the worker executing it. A
+    `tasks/resubscribe` elsewhere gets just the stored task, and a `tasks/cancel`
+    elsewhere takes up to `CANCEL_POLL_SECONDS` to stop the run. Route those by
+    affinity to stream and stop at once.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.worker = str(os.getpid()).encode()
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or scope['method'] != 'POST':
+            await self.app(scope, receive, send)
+            return
+
+        # JSON-RPC requests are small, so buffer the body to read the context ID
+        chunks = []
+        more_body = True
+        while more_body:
+            message = await receive()
+            if message['type'] != 'http.request':
+                # The client disconnected before sending the whole request
+                return
+            chunks.append(message.get('body', b''))
+            more_body = message.get('more_body', False)
+        body = b''.join(chunks)
+        context_id = _context_id(body)
+
+        body_sent = False
+
+        async def replay():
+            nonlocal body_sent
+            if not body_sent:
+                body_sent = True
+                return {'type': 'http.request', 'body': body, 'more_body': False}
+            return await receive()
+
+        async def send_with_hints(message):
+            if message['type'] == 'http.response.start':
+                headers = list(message.get('headers', []))
+                headers.append((WORKER_HEADER, self.worker))
+                if context_id:
+                    headers.append((CONTEXT_ID_HEADER, context_id.encode('utf-8')))
+                    headers.append((AFFINITY_HEADER, affinity_key(context_id).encode()))
+                message = {**message, 'headers': headers}
+            await send(message)
+
+        await self.app(scope, replay, send_with_hints)
@@ -1,24 +1,64 @@
-import os
 import json
+import os
+import re
+import uuid
 from typing import Any, AsyncIterable
 
 from google import genai
+from google.adk.agents.callback_context import CallbackContext
 from google.adk.agents.llm_agent import LlmAgent
+from google.adk.agents.run_config import RunConfig, StreamingMode
 from google.adk.artifacts import InMemoryArtifactService
+from google.adk.events import Event, EventActions
+from google.adk.models import BaseLlm, LlmRequest
 from google.adk.memory.in_memory_memory_service import InMemoryMemoryService
 from google.adk.runners import Runner
-from google.adk.sessions import InMemorySessionService
 from google.adk.tools.tool_context import ToolContext
 from google.genai import types
 
+from admission import TokenBucket
+from artifact_store import SqliteArtifactService
+from form_schema import get_form_schema
+from risk_scoring import model_input
+from session_store import BoundedSessionService, SqliteSessionStore
+
+# Stream the risk report to the client as it is generated
+REPORT_STREAMING = os.getenv('REPORT_STREAMING', 'true').lower() != 'false'
+# Serve the questionnaire without a model call when a new application starts
+FORM_FAST_PATH = os.getenv('FORM_FAST_PATH', 'true').lower() != 'false'
+# Whole messages that ask to (re)start an application in an existing session, e.g.
+# "start a new application" or "I want to apply for health insurance"
+START_APPLICATION_PATTERN = re.compile(
+    r'\s*(?:(?:please|ok|okay|hi|hello)[,!]?\s+)?(?:i\s+(?:want|would\s+like|need)\s+to\s+|let\'?s\s+)?'
+    r'(?:(?:start|begin|restart)\s+(?:(?:a|an|the|my|new)\s+)*(?:insurance\s+)?(?:application|questionnaire|form)'
+    r'|apply\s+for\s+(?:(?:a|an|new)\s+)*(?:health\s+)?insurance(?:\s+policy)?'
+    r'|get\s+(?:(?:a|an|new)\s+)*health\s+insurance(?:\s+policy)?)'
+    r'(?:\s+again)?(?:\s+please)?\s*[.!]?\s*',
+    re.IGNORECASE,
+)
+
+# Send the report model precomputed risk factors instead of the raw answers
+RISK_PRESCORING = os.getenv('RISK_PRESCORING', 'true').lower() != 'false'
+# gemini-2.5-flash requests per minute for this deployment's quota tier, split across worker processes
+GEMINI_RPM = float(os.getenv('GEMINI_RPM', 1000))
+model_rate_limiter = TokenBucket(GEMINI_RPM / max(1, int(os.getenv('A2A_WORKERS', 1))))
+# Progress text reported while the agent calls each tool
+PROGRESS_STEPS = {
+    'form_creator': 'Building the questionnaire form...',
+    'return_form_to_user': 'Preparing the form for you...',
+}
+
+async def throttle_model_call(callback_context: CallbackContext, llm_request: LlmRequest) -> None:
+    """Waits for a token before every Gemini call so bursts stay within the quota."""
+    waited = await model_rate_limiter.acquire()
+    if waited >= 1:
+        print(f"model call throttled for {waited:.1f}s")
+    return None
+
 def form_creator() -> dict[str, Any]:
     """Call this tool first to get the JSON schema for the insurance questionnaire form."""
     print("calling form_creator")
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    json_path = os.path.join(script_dir, 'my_dict1.json')
-    with open(json_path, "r") as f:
-        initial_form_dict = json.load(f)
-    return initial_form_dict
+    return get_form_schema().as_dict()
 
 def return_form_to_user(
     form_schema: dict[str, Any],
@@ -35,6 +75,9 @@ def return_form_to_user(
 
     tool_context.actions.skip_summarization = True
     tool_context.actions.escalate = True
+    cached_schema = get_form_schema()
+    if cached_schema.matches(form_schema):
+        return cached_schema.form_payload
     form_dict = {
         'type': 'form',
         'form': form_schema,
@@ -48,24 +91,130 @@ class InsuranceAgent:
 
     SUPPORTED_CONTENT_TYPES = ['text', 'text/plain', 'application/json']
 
-    def __init__(self):
-        self._agent = self._build_agent()
+    def __init__(self, model: str | BaseLlm = 'gemini-2.5-flash'):
+        self._agent = self._build_agent(model)
         self._user_id = 'insurance_seeker'
+        # With A2A_SHARED_STATE, worker processes share sessions and artifacts through SQLite
+        shared_state = os.getenv('A2A_SHARED_STATE', 'false').lower() == 'true'
+        artifact_db_path = os.getenv('ARTIFACT_DB_PATH')
+        if artifact_db_path:
+            self._artifact_service = SqliteArtifactService(artifact_db_path)
+        else:
+            self._artifact_service = InMemoryArtifactService()
+        # Sessions are capped and expire when idle; SESSION_DB_PATH persists them across restarts
+        session_db_path = os.getenv('SESSION_DB_PATH')
+        self.session_service = BoundedSessionService(
+            max_sessions=int(os.getenv('SESSION_MAX', 1000)),
+            idle_ttl_seconds=float(os.getenv('SESSION_IDLE_TTL_SECONDS', 3600)),
+            store=SqliteSessionStore(session_db_path) if session_db_path else None,
+            write_batch_size=int(os.getenv('SESSION_WRITE_BATCH_SIZE', 20)),
+            flush_interval_seconds=float(os.getenv('SESSION_FLUSH_INTERVAL_SECONDS', 2)),
+            retention_seconds=float(os.getenv('SESSION_RETENTION_SECONDS', 7 * 24 * 3600)),
+            # Persisted artifacts outlive the in-memory copy of their session
+            on_evict=None if artifact_db_path else self._release_session_artifacts,
+            shared=shared_state,
+        )
         self._runner = Runner(
             app_name=self._agent.name,
             agent=self._agent,
-            artifact_service=InMemoryArtifactService(),
-            session_service=InMemorySessionService(),
+            artifact_service=self._artifact_service,
+            session_service=self.session_service,
             memory_service=InMemoryMemoryService(),
         )
 
-    def get_processing_message(self) -> str:
+    async def _release_session_artifacts(self, app_name: str, user_id: str, session_id: str) -> None:
+        """Drops the artifacts of a session evicted from memory."""
+        filenames = await self._artifact_service.list_artifact_keys(
+            app_name=app_name, user_id=user_id, session_id=session_id
+        )
+        for filename in filenames:
+            await self._artifact_service.delete_artifact(
+                app_name=app_name, user_id=user_id, session_id=session_id, filename=filename
+            )
+
+    async def release_session(self, session_id: str) -> None:
+        """Deletes a session and its artifacts, e.g. once its task is canceled."""
+        await self.session_service.delete_session(
+            app_name=self._agent.name, user_id=self._user_id, session_id=session_id
+        )
+        await self._release_session_artifacts(self._agent.name, self._user_id, session_id)
+
+    def get_processing_message(self, event: Event | None = None, is_form_submission: bool = False) -> str:
+        """Describes the step the agent is on, based on the tool calls in `event`."""
+        if event is not None:
+            for call in event.get_function_calls():
+                if call.name in PROGRESS_STEPS:
+                    return PROGRESS_STEPS[call.name]
+            for response in event.get_function_responses():
+                if response.name in PROGRESS_STEPS:
+                    return PROGRESS_STEPS[response.name]
+        if is_form_submission:
+            return 'Analyzing your answers...'
         return 'Processing your insurance request...'
 
-    def _build_agent(self) -> LlmAgent:
+    async def _serve_form(self, session, content: types.Content) -> dict[str, Any]:
+        """Returns the questionnaire form directly, recording the turn in the session
+        as if the model had called form_creator and return_form_to_user."""
+        print("-----SERVING FORM WITHOUT LLM-----")
+        form_schema = get_form_schema()
+        schema = form_schema.as_dict()
+        invocation_id = f'e-{uuid.uuid4()}'
+        events = [Event(invocation_id=invocation_id, author='user', content=content)]
+        # The same call and response events the two tool calls would have produced
+        for name, args, response, actions in (
+            ('form_creator', {}, schema, EventActions()),
+            (
+                'return_form_to_user', {'form_schema': schema}, {'result': form_schema.form_payload},
+                EventActions(skip_summarization=True, escalate=True),
+            ),
+        ):
+            call_id = f'adk-{uuid.uuid4()}'
+            events.append(Event(
+                invocation_id=invocation_id,
+                author=self._agent.name,
+                content=types.Content(role='model', parts=[
+                    types.Part(function_call=types.FunctionCall(id=call_id, name=name, args=args)),
+                ]),
+            ))
+            events.append(Event(
+                invocation_id=invocation_id,
+                author=self._agent.name,
+                content=types.Content(role='user', parts=[
+                    types.Part(function_response=types.FunctionResponse(id=call_id, name=name, response=response)),
+                ]),
+                actions=actions,
+            ))
+        for event in events:
+            await self._runner.session_service.append_event(session, event)
+        return {
+            'is_task_complete': True,
+            'content': {'response': {'result': form_schema.form_payload}},
+        }
+
+    def _return_form_errors(self, form_data: Any, errors: list[dict[str, str]]) -> dict[str, Any]:
+        """Sends the form back with the submitted answers and what to fix, without a model call.
+
+        PII answers are not echoed: the reply becomes a model event in the
+        orchestrator's session, so the client re-fills those fields itself.
+        """
+        print(f"-----REJECTED FORM SUBMISSION WITH {len(errors)} ERRORS-----")
+        form_schema = get_form_schema()
+        form_dict = {
+            'type': 'form',
+            # Only serialized below, so the shared read-only schema needs no copy
+            'form': form_schema.schema,
+            'form_data': form_schema.validator.without_pii(form_data),
+            'errors': errors,
+        }
+        return {
+            'is_task_complete': True,
+            'content': {'response': {'result': json.dumps(form_dict, default=dict)}},
+        }
+
+    def _build_agent(self, model: str | BaseLlm) -> LlmAgent:
         """Builds the LLM agent for the insurance agent."""
         return LlmAgent(
-            model='gemini-2.5-flash',
+            model=model,
             name='insurance_agent',
             description='This agent helps users with health insurance assessments.',
             instruction="""You are an information collector agent that collects user's medical history.
@@ -75,8 +224,10 @@ FOLLOW THIS EXACT WORKFLOW:
 1. First, call `form_creator` to get insurance questionnaire form.
 2. Second, use `return_form_to_user` to respond back to the user. Pass the form_schema exactly how you recieve it from form_creator without changing the order.
 
-If you see filled form with form data do as below:
+If you see filled form with form data do as below (identifying fields have already been removed from it):
 *** Analyze the information and generate a concise risk assessment report with "Summary of Information" and "Identified Risk Factors" sections. 
+If the form data contains a `risk_profile`, its score, level and factors were computed by fixed rules: report them as given in "Identified Risk Factors" and explain them, without adding or re-deriving factors.
+Its `unclear_answers` are yes/no questions the applicant answered in their own words, which were not scored: read each `detail` yourself, mention the ones that indicate a risk (e.g. a former smoker) and ignore the ones that mean no.
 Make sure it contains no Personally Identifiable Information. Output this report as your final text answer to the client agent. ***
 """,
 
@@ -84,6 +235,7 @@ Make sure it contains no Personally Identifiable Information. Output this report
                 form_creator,
                 return_form_to_user,
             ],
+            before_model_callback=throttle_model_call,
         )
 
     async def stream(self, query, session_id) -> AsyncIterable[dict[str, Any]]:
@@ -93,12 +245,21 @@ Make sure it contains no Personally Identifiable Information. Output this report
             session_id=session_id,
         )
 
+        is_form_submission = False
+        form_errors = None
         try:
             data = json.loads(query)
             if isinstance(data, dict) and "form_data" in data:
+                is_form_submission = True
                 print("-----INSIDE FORM DATA-----")
+                # Only the validated, anonymized answers reach the model and the session
+                validation = get_form_schema().validator.validate(data["form_data"])
+                form_errors = validation.errors
+                payload = validation.payload
+                if RISK_PRESCORING and validation.is_valid:
+                    payload = model_input(payload)
                 content = types.Content(
-                    role='user', parts=[types.Part.from_text(text=json.dumps(data["form_data"]))]
+                    role='user', parts=[types.Part.from_text(text=json.dumps(payload))]
                 )
             else:
                 print("-----INSIDE ELSE BLOCK-----")
@@ -110,6 +271,11 @@ Make sure it contains no Personally Identifiable Information. Output this report
                 role='user', parts=[types.Part.from_text(text=query)]
             )
 
+        if form_errors:
+            yield self._return_form_errors(data["form_data"], form_errors)
+            return
+
+        is_new_session = session is None
         if session is None:
             session = await self._runner.session_service.create_session(
                 app_name=self._agent.name,
@@ -117,9 +283,36 @@ Make sure it contains no Personally Identifiable Information. Output this report
                 state={},
                 session_id=session_id,
             )
+
+        if FORM_FAST_PATH and not is_form_submission and (
+            is_new_session or START_APPLICATION_PATTERN.fullmatch(query)
+        ):
+            yield await self._serve_form(session, content)
+            return
+
+        # Only the report turn produces user-facing prose worth streaming
+        run_config = RunConfig(
+            streaming_mode=StreamingMode.SSE
+            if REPORT_STREAMING and is_form_submission
+            else StreamingMode.NONE
+        )
         async for event in self._runner.run_async(
-            user_id=self._user_id, session_id=session.id, new_message=content
+            user_id=self._user_id,
+            session_id=session.id,
+            new_message=content,
+            run_config=run_config,
         ):
+            if event.partial:
+                text = ''.join(
+                    p.text for p in (event.content.parts if event.content else [])
+                    if p.text and not p.thought
+                )
+                if text:
+                    yield {
+                        'is_task_complete': False,
+                        'partial_text': text,
+                    }
+                continue
             if event.is_final_response():
                 response = ''
                 if (
@@ -154,5 +347,5 @@ Make sure it contains no Personally Identifiable Information. Output this report
             else:
                 yield {
                     'is_task_complete': False,
-                    'updates': self.get_processing_message(),
-                }
\ No newline at end of file
+                    'updates': self.get_processing_message(event, is_form_submission),
+                }
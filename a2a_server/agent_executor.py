@@ -1,16 +1,23 @@
 
+import asyncio
 import json
+import os
+import uuid
 
 from a2a.server.agent_execution import AgentExecutor, RequestContext
 from a2a.server.events import EventQueue
-from a2a.server.tasks import TaskUpdater
+from a2a.server.tasks import TaskStore, TaskUpdater
 from a2a.types import (
+    Artifact,
     DataPart,
     Part,
+    Role,
     Task,
+    TaskArtifactUpdateEvent,
+    TaskNotCancelableError,
+    TaskNotFoundError,
     TaskState,
     TextPart,
-    UnsupportedOperationError,
 )
 from a2a.utils import (
     new_agent_parts_message,
@@ -19,14 +26,43 @@ from a2a.utils import (
 )
 from a2a.utils.errors import ServerError
 
-from agent import InsuranceAgent
+from admission import AdmissionController, AdmissionRejected
+from agent import InsuranceAgent, model_rate_limiter
+from progress import ProgressPublisher
+from task_store import FINISHED_STATES
+
+# Progress updates arriving closer together than this are coalesced into one
+PROGRESS_WINDOW_SECONDS = float(os.getenv('PROGRESS_WINDOW_SECONDS', '0.5'))
+# Progress updates sent per task at most; final state transitions are always sent
+PROGRESS_MAX_UPDATES = int(os.getenv('PROGRESS_MAX_UPDATES', '10'))
+# Tasks run at once, tasks waiting for a slot, and how long one may wait before being rejected
+MAX_CONCURRENT_TASKS = int(os.getenv('MAX_CONCURRENT_TASKS', '8'))
+MAX_QUEUED_TASKS = int(os.getenv('MAX_QUEUED_TASKS', '32'))
+QUEUE_TIMEOUT_SECONDS = float(os.getenv('QUEUE_TIMEOUT_SECONDS', '30'))
+# How long a cancel waits for the model run to stop before releasing its session
+CANCEL_TIMEOUT_SECONDS = float(os.getenv('CANCEL_TIMEOUT_SECONDS', '5'))
+# How often a running task checks the shared task store for a cancel made by another worker
+CANCEL_POLL_SECONDS = float(os.getenv('CANCEL_POLL_SECONDS', '1'))
 
 
 class InsuranceAgentExecutor(AgentExecutor):
     """Insurance AgentExecutor Example."""
 
-    def __init__(self):
-        self.agent = InsuranceAgent()
+    def __init__(self, agent: InsuranceAgent | None = None):
+        self.agent = agent or InsuranceAgent()
+        self.admission = AdmissionController(
+            max_concurrency=MAX_CONCURRENT_TASKS,
+            max_queue=MAX_QUEUED_TASKS,
+            queue_timeout_seconds=QUEUE_TIMEOUT_SECONDS,
+        )
+        # task_id -> the asyncio task executing it, so it can be canceled
+        self._running: dict[str, asyncio.Task] = {}
+        # task_id -> set once an execution stopped by `cancel` has published the canceled status
+        self._canceling: dict[str, asyncio.Event] = {}
+        # The task store shared with the request handler; set by build_app
+        self.task_store: TaskStore | None = None
+        # With A2A_SHARED_STATE, `tasks/cancel` may reach a worker other than the one running the task
+        self.shared_state = os.getenv('A2A_SHARED_STATE', 'false').lower() == 'true'
 
     async def execute(
         self,
@@ -35,24 +71,80 @@ class InsuranceAgentExecutor(AgentExecutor):
     ) -> None:
         query = context.get_user_input()
         task = context.current_task
+        is_new_task = task is None
         print("AGENT EXECUTOR QUERY------> ", query)
         if not task:
             task = new_task(context.message)
             await event_queue.enqueue_event(task)
         updater = TaskUpdater(event_queue, task.id, task.contextId)
+        progress = ProgressPublisher(
+            updater, task.contextId, task.id,
+            window_seconds=PROGRESS_WINDOW_SECONDS,
+            max_updates=PROGRESS_MAX_UPDATES,
+        )
+        self._running[task.id] = asyncio.current_task()
+        watcher = None
+        if self.shared_state and self.task_store is not None:
+            watcher = asyncio.create_task(self._watch_for_cancel(task, asyncio.current_task()))
+        try:
+            async with self.admission.slot() as waited:
+                if waited >= 1:
+                    print(f"task {task.id} waited {waited:.1f}s for a slot")
+                await self._run(query, task, event_queue, updater, progress)
+        except AdmissionRejected as e:
+            print(f"REJECTED TASK {task.id}: {e.reason}")
+            await self._publish_rejected(updater, task, e, is_new_task)
+        except asyncio.CancelledError:
+            if task.id not in self._canceling:
+                raise
+            # Stopped by `cancel`: end the task on the queue clients are streaming
+            # from, and return normally so the request handler closes it cleanly
+            await progress.close()
+            await self._publish_canceled(updater, task)
+            self._canceling[task.id].set()
+            if watcher is not None and watcher.done():
+                # Canceled by another worker, which already deleted the session;
+                # delete it again in case this run wrote to it in the meantime
+                await self.agent.release_session(task.contextId)
+                print(f"CANCELED TASK {task.id} BY ANOTHER WORKER")
+        finally:
+            if watcher is not None:
+                watcher.cancel()
+            if self._running.get(task.id) is asyncio.current_task():
+                del self._running[task.id]
+            self._canceling.pop(task.id, None)
+            await progress.close()
+
+    async def _run(
+        self,
+        query: str,
+        task: Task,
+        event_queue: EventQueue,
+        updater: TaskUpdater,
+        progress: ProgressPublisher,
+    ) -> None:
+        report_artifact_id = None
 
         async for item in self.agent.stream(query, task.contextId):
             is_task_complete = item['is_task_complete']
 
-            if not is_task_complete:
-                await updater.update_status(
-                    TaskState.working,
-                    new_agent_text_message(
-                        item['updates'], task.contextId, task.id
-                    ),
+            if 'partial_text' in item:
+                # Each chunk is appended to the report artifact as it arrives
+                is_first_chunk = report_artifact_id is None
+                report_artifact_id = report_artifact_id or str(uuid.uuid4())
+                await self._publish_report_chunk(
+                    event_queue, task, report_artifact_id, item['partial_text'],
+                    append=not is_first_chunk, last_chunk=False,
                 )
                 continue
 
+            if not is_task_complete:
+                await progress.publish(item['updates'])
+                continue
+
+            # No progress update may follow the final state transition
+            await progress.close()
+
             if isinstance(item['content'], dict):
                 if (
                     'response' in item['content']
@@ -81,13 +173,118 @@ class InsuranceAgentExecutor(AgentExecutor):
                     )
                     break
             else: # Its a final text response (the report)
-                await updater.add_artifact(
-                    [Part(root=TextPart(text=item['content']))], name='report'
-                )
+                if report_artifact_id:
+                    # Replace the streamed chunks with the complete report and close the stream
+                    await self._publish_report_chunk(
+                        event_queue, task, report_artifact_id, item['content'],
+                        append=False, last_chunk=True,
+                    )
+                else:
+                    await updater.add_artifact(
+                        [Part(root=TextPart(text=item['content']))], name='report'
+                    )
                 await updater.complete()
                 break
 
+    async def _publish_report_chunk(
+        self,
+        event_queue: EventQueue,
+        task: Task,
+        artifact_id: str,
+        text: str,
+        append: bool,
+        last_chunk: bool,
+    ) -> None:
+        await event_queue.enqueue_event(
+            TaskArtifactUpdateEvent(
+                taskId=task.id,
+                contextId=task.contextId,
+                artifact=Artifact(
+                    artifactId=artifact_id,
+                    name='report',
+                    parts=[Part(root=TextPart(text=text))],
+                ),
+                append=append,
+                lastChunk=last_chunk,
+            )
+        )
+
     async def cancel(
         self, request: RequestContext, event_queue: EventQueue
     ) -> Task | None:
-        raise ServerError(error=UnsupportedOperationError())
+        task = request.current_task
+        if not task:
+            raise ServerError(error=TaskNotFoundError())
+        if task.status.state in FINISHED_STATES:
+            raise ServerError(error=TaskNotCancelableError())
+
+        running = self._running.get(task.id)
+        published = False
+        if running is not None and not running.done():
+            # Stops the ADK run and any Gemini call it is waiting on; the execution
+            # then publishes the canceled status, which reaches `event_queue` too.
+            # Waiting for the whole execution instead can deadlock: before Python 3.13
+            # its queue only closes once `event_queue`, tapped from it, is consumed.
+            stopped = self._canceling[task.id] = asyncio.Event()
+            running.cancel()
+            try:
+                await asyncio.wait_for(stopped.wait(), CANCEL_TIMEOUT_SECONDS)
+                published = True
+            except TimeoutError:
+                pass
+        await self.agent.release_session(task.contextId)
+        print(f"CANCELED TASK {task.id}, RUNNING: {running is not None}")
+        if not published:
+            await self._publish_canceled(TaskUpdater(event_queue, task.id, task.contextId), task)
+
+    async def _watch_for_cancel(self, task: Task, running: asyncio.Task) -> None:
+        """Stops `running` once another worker has canceled its task in the shared store."""
+        while True:
+            await asyncio.sleep(CANCEL_POLL_SECONDS)
+            stored = await self.task_store.get(task.id)
+            if stored is not None and stored.status.state == TaskState.canceled:
+                self._canceling[task.id] = asyncio.Event()
+                running.cancel()
+                return
+
+    async def _publish_rejected(
+        self, updater: TaskUpdater, task: Task, rejection: AdmissionRejected, is_new_task: bool
+    ) -> None:
+        text = f'The service is busy right now. Please try again in {rejection.retry_after_seconds} seconds.'
+        if is_new_task:
+            message = new_agent_text_message(text, task.contextId, task.id)
+            state = TaskState.rejected
+        else:
+            # A continuing task, e.g. a form submission, stays open so the same
+            # message can be sent again: re-send what it was waiting on with the notice.
+            # The new message moved that request from the status into the history.
+            waiting_on = next(
+                (message for message in reversed(task.history or []) if message.role == Role.agent), None
+            )
+            previous_parts = waiting_on.parts if waiting_on else []
+            message = new_agent_parts_message(
+                [Part(root=TextPart(text=text)), *previous_parts], task.contextId, task.id
+            )
+            state = TaskState.input_required
+        # Machine-readable equivalent of an HTTP 429 with Retry-After
+        message.metadata = {
+            'reason': rejection.reason,
+            'retry_after_seconds': rejection.retry_after_seconds,
+        }
+        await updater.update_status(state, message, final=True)
+
+    def stats(self) -> dict:
+        return {
+            'admission': self.admission.stats(),
+            'model_rate_limit': model_rate_limiter.stats(),
+            'sessions': self.agent.session_service.stats(),
+        }
+
+    async def _publish_canceled(self, updater: TaskUpdater, task: Task) -> None:
+        await updater.update_status(
+            TaskState.canceled,
+            new_agent_text_message(
+                'The insurance application was canceled.', task.contextId, task.id
+            ),
+            final=True,
+        )
@@ -0,0 +1,123 @@
+import asyncio
+import sqlite3
+import threading
+from typing import Optional
+
+from google.adk.artifacts import BaseArtifactService
+from google.genai import types
+
+# Artifacts whose filename has this prefix belong to the user rather than one session
+USER_NAMESPACE_PREFIX = 'user:'
+
+
+class SqliteArtifactService(BaseArtifactService):
+    """An ADK artifact service keeping every artifact version in a SQLite file.
+
+    Several worker processes can open the same file, so an artifact saved while
+    one worker handles a message is visible to the worker handling the next.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS artifacts ('
+            ' app_name TEXT NOT NULL, user_id TEXT NOT NULL, session_id TEXT NOT NULL,'
+            ' filename TEXT NOT NULL, version INTEGER NOT NULL, payload TEXT NOT NULL,'
+            ' PRIMARY KEY (app_name, user_id, session_id, filename, version))'
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def _scope(session_id: Optional[str], filename: str) -> str:
+        # User-namespaced artifacts are shared by all of the user's sessions
+        return '' if filename.startswith(USER_NAMESPACE_PREFIX) or session_id is None else session_id
+
+    def _save_sync(self, app_name, user_id, session_id, filename, artifact: types.Part) -> int:
+        with self._lock:
+            # BEGIN IMMEDIATE takes the write lock before reading the latest version,
+            # so concurrent workers cannot both claim the same version number
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                row = self._conn.execute(
+                    'SELECT MAX(version) FROM artifacts'
+                    ' WHERE app_name = ? AND user_id = ? AND session_id = ? AND filename = ?',
+                    (app_name, user_id, session_id, filename),
+                ).fetchone()
+                version = 0 if row[0] is None else row[0] + 1
+                self._conn.execute(
+                    'INSERT INTO artifacts VALUES (?, ?, ?, ?, ?, ?)',
+                    (app_name, user_id, session_id, filename, version, artifact.model_dump_json(exclude_none=True)),
+                )
+                self._conn.commit()
+            except Exception:
+                self._conn.rollback()
+                raise
+        return version
+
+    def _load_sync(self, app_name, user_id, session_id, filename, version) -> Optional[types.Part]:
+        with self._lock:
+            if version is None:
+                row = self._conn.execute(
+                    'SELECT payload FROM artifacts'
+                    ' WHERE app_name = ? AND user_id = ? AND session_id = ? AND filename = ?'
+                    ' ORDER BY version DESC LIMIT 1',
+                    (app_name, user_id, session_id, filename),
+                ).fetchone()
+            else:
+                row = self._conn.execute(
+                    'SELECT payload FROM artifacts'
+                    ' WHERE app_name = ? AND user_id = ? AND session_id = ? AND filename = ? AND version = ?',
+                    (app_name, user_id, session_id, filename, version),
+                ).fetchone()
+        return types.Part.model_validate_json(row[0]) if row else None
+
+    def _query(self, sql: str, params: tuple) -> list[tuple]:
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def _execute(self, sql: str, params: tuple) -> None:
+        with self._lock:
+            self._conn.execute(sql, params)
+            self._conn.commit()
+
+    async def save_artifact(
+        self, *, app_name: str, user_id: str, session_id: Optional[str], filename: str, artifact: types.Part, **kwargs
+    ) -> int:
+        return await asyncio.to_thread(
+            self._save_sync, app_name, user_id, self._scope(session_id, filename), filename, artifact
+        )
+
+    async def load_artifact(
+        self, *, app_name: str, user_id: str, session_id: Optional[str], filename: str, version: Optional[int] = None
+    ) -> Optional[types.Part]:
+        return await asyncio.to_thread(
+            self._load_sync, app_name, user_id, self._scope(session_id, filename), filename, version
+        )
+
+    async def list_artifact_keys(self, *, app_name: str, user_id: str, session_id: Optional[str]) -> list[str]:
+        rows = await asyncio.to_thread(
+            self._query,
+            'SELECT DISTINCT filename FROM artifacts'
+            ' WHERE app_name = ? AND user_id = ? AND session_id IN (?, ?) ORDER BY filename',
+            (app_name, user_id, session_id or '', ''),
+        )
+        return [row[0] for row in rows]
+
+    async def delete_artifact(self, *, app_name: str, user_id: str, session_id: Optional[str], filename: str) -> None:
+        await asyncio.to_thread(
+            self._execute,
+            'DELETE FROM artifacts WHERE app_name = ? AND user_id = ? AND session_id = ? AND filename = ?',
+            (app_name, user_id, self._scope(session_id, filename), filename),
+        )
+
+    async def list_versions(self, *, app_name: str, user_id: str, session_id: Optional[str], filename: str) -> list[int]:
+        rows = await asyncio.to_thread(
+            self._query,
+            'SELECT version FROM artifacts'
+            ' WHERE app_name = ? AND user_id = ? AND session_id = ? AND filename = ? ORDER BY version',
+            (app_name, user_id, self._scope(session_id, filename), filename),
+        )
+        return [row[0] for row in rows]
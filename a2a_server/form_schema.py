@@ -0,0 +1,75 @@
+import hashlib
+import json
+import os
+import threading
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import Any, Mapping
+
+from form_validation import FormValidator
+
+FORM_SCHEMA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'my_dict1.json')
+
+
+def _freeze(value: Any) -> Any:
+    if isinstance(value, dict):
+        return MappingProxyType({key: _freeze(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
+@dataclass(frozen=True)
+class FormSchema:
+    """An immutable, parsed questionnaire schema with its serialized forms precomputed."""
+
+    # Parsed once and shared by every caller: read-only mappings and tuples; see `as_dict`
+    schema: Mapping[str, Any] = field(repr=False, compare=False)
+    serialized: str
+    form_payload: str
+    version: str
+    mtime_ns: int
+    # Compiled once per schema version
+    validator: FormValidator = field(repr=False, compare=False)
+
+    def as_dict(self) -> dict[str, Any]:
+        """Returns a fresh, mutable copy of the schema, for callers that hand it on to code that may change it."""
+        return json.loads(self.serialized)
+
+    def matches(self, form_schema: dict[str, Any]) -> bool:
+        """Whether the given schema is identical to this one."""
+        return _freeze(form_schema) == self.schema
+
+
+_cache: dict[str, FormSchema] = {}
+_lock = threading.Lock()
+
+
+def _load(path: str, mtime_ns: int) -> FormSchema:
+    with open(path, 'rb') as f:
+        raw = f.read()
+    schema = json.loads(raw)
+    serialized = json.dumps(schema)
+    form_payload = json.dumps({'type': 'form', 'form': schema, 'form_data': {}})
+    return FormSchema(
+        schema=_freeze(schema),
+        serialized=serialized,
+        form_payload=form_payload,
+        version=hashlib.sha256(raw).hexdigest()[:16],
+        mtime_ns=mtime_ns,
+        validator=FormValidator(schema),
+    )
+
+
+def get_form_schema(path: str = FORM_SCHEMA_PATH) -> FormSchema:
+    """Returns the cached schema, re-reading the file only when its mtime changed."""
+    mtime_ns = os.stat(path).st_mtime_ns
+    cached = _cache.get(path)
+    if cached is not None and cached.mtime_ns == mtime_ns:
+        return cached
+    with _lock:
+        cached = _cache.get(path)
+        if cached is None or cached.mtime_ns != mtime_ns:
+            cached = _cache[path] = _load(path, mtime_ns)
+            print(f"loaded form schema version {cached.version}")
+        return cached
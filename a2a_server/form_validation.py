@@ -0,0 +1,197 @@
+import datetime
+import re
+from dataclasses import dataclass, field
+from typing import Any, Callable, Mapping
+
+# Schema annotation marking a field as personally identifiable, with how to redact it
+PII_ANNOTATION = 'x-pii'
+# Redaction strategies: 'drop' removes the field before the submission reaches the model
+PII_STRATEGIES = ('drop',)
+
+# Returns the normalized value, or raises ValueError with a message for the user
+FieldCheck = Callable[[Any], Any]
+
+
+def _is_empty(value: Any) -> bool:
+    return value is None or (isinstance(value, str) and not value.strip())
+
+
+def _check_string(value: Any) -> str:
+    if not isinstance(value, str):
+        raise ValueError('must be text')
+    return value.strip()
+
+
+def _check_number(value: Any) -> float | int:
+    # Form widgets often submit numbers as text
+    if isinstance(value, str):
+        try:
+            value = float(value.strip())
+        except ValueError:
+            raise ValueError('must be a number') from None
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or value != value:
+        raise ValueError('must be a number')
+    return int(value) if float(value).is_integer() else value
+
+
+def _check_integer(value: Any) -> int:
+    value = _check_number(value)
+    if not isinstance(value, int):
+        raise ValueError('must be a whole number')
+    return value
+
+
+def _check_boolean(value: Any) -> bool:
+    if isinstance(value, str) and value.strip().lower() in ('true', 'false'):
+        return value.strip().lower() == 'true'
+    if not isinstance(value, bool):
+        raise ValueError('must be true or false')
+    return value
+
+
+TYPE_CHECKS: dict[str, FieldCheck] = {
+    'string': _check_string,
+    'number': _check_number,
+    'integer': _check_integer,
+    'boolean': _check_boolean,
+}
+
+
+def _check_date(value: str) -> str:
+    try:
+        datetime.date.fromisoformat(value)
+    except ValueError:
+        raise ValueError('must be a date (YYYY-MM-DD)') from None
+    return value
+
+
+FORMAT_CHECKS: dict[str, FieldCheck] = {
+    'date': _check_date,
+}
+
+
+def _compile_field(name: str, spec: Mapping[str, Any]) -> FieldCheck:
+    """Builds one function applying every constraint the schema declares for a field."""
+    checks: list[FieldCheck] = []
+    field_type = spec.get('type')
+    if field_type is not None:
+        if field_type not in TYPE_CHECKS:
+            raise ValueError(f'Unsupported type {field_type!r} for form field {name!r}')
+        checks.append(TYPE_CHECKS[field_type])
+    if spec.get('format') in FORMAT_CHECKS:
+        checks.append(FORMAT_CHECKS[spec['format']])
+    if 'enum' in spec:
+        allowed = tuple(spec['enum'])
+        message = 'must be one of ' + ', '.join(str(option) for option in allowed)
+
+        def check_enum(value):
+            if value not in allowed:
+                raise ValueError(message)
+            return value
+
+        checks.append(check_enum)
+    if 'minimum' in spec or 'maximum' in spec:
+        minimum = spec.get('minimum', float('-inf'))
+        maximum = spec.get('maximum', float('inf'))
+
+        def check_range(value):
+            if not minimum <= value <= maximum:
+                raise ValueError(f'must be between {minimum} and {maximum}')
+            return value
+
+        checks.append(check_range)
+    if 'maxLength' in spec:
+        max_length = spec['maxLength']
+
+        def check_length(value):
+            if len(value) > max_length:
+                raise ValueError(f'must be at most {max_length} characters')
+            return value
+
+        checks.append(check_length)
+    if 'pattern' in spec:
+        pattern = re.compile(spec['pattern'])
+
+        def check_pattern(value):
+            if not pattern.search(value):
+                raise ValueError('is not in the expected format')
+            return value
+
+        checks.append(check_pattern)
+
+    def check(value):
+        for field_check in checks:
+            value = field_check(value)
+        return value
+
+    return check
+
+
+@dataclass(frozen=True)
+class ValidationResult:
+    """The outcome of validating one submission."""
+
+    # The submission with PII removed, empty answers dropped and values normalized
+    payload: dict[str, Any]
+    # One {'field', 'title', 'message'} entry per problem, in form order
+    errors: list[dict[str, str]] = field(default_factory=list)
+
+    @property
+    def is_valid(self) -> bool:
+        return not self.errors
+
+
+class FormValidator:
+    """Validates and anonymizes questionnaire submissions against the form schema.
+
+    The schema is compiled once into per-field checks. Fields annotated with
+    `x-pii` are redacted, and fields the schema does not define are never passed
+    on, so only the answers needed for the risk assessment reach the model.
+    """
+
+    def __init__(self, schema: Mapping[str, Any]):
+        properties = schema.get('properties', {})
+        self.fields: tuple[tuple[str, str, FieldCheck], ...] = tuple(
+            (name, spec.get('title', name), _compile_field(name, spec))
+            for name, spec in properties.items()
+        )
+        self.pii_fields: dict[str, str] = {}
+        for name, spec in properties.items():
+            strategy = spec.get(PII_ANNOTATION)
+            if strategy is None:
+                continue
+            if strategy not in PII_STRATEGIES:
+                raise ValueError(f'Unknown {PII_ANNOTATION} strategy {strategy!r} for form field {name!r}')
+            self.pii_fields[name] = strategy
+        # The form cannot collect a required field it does not define, so those are skipped
+        self.required = frozenset(name for name in schema.get('required', ()) if name in properties)
+
+    def without_pii(self, form_data: Any) -> dict[str, Any]:
+        """The submitted answers to fields the schema defines and does not mark as PII, as submitted."""
+        if not isinstance(form_data, Mapping):
+            return {}
+        return {
+            name: form_data[name]
+            for name, _, _ in self.fields
+            if name in form_data and name not in self.pii_fields
+        }
+
+    def validate(self, form_data: Any) -> ValidationResult:
+        if not isinstance(form_data, Mapping):
+            return ValidationResult({}, [{'field': '', 'title': '', 'message': 'The form data must be an object.'}])
+        payload = {}
+        errors = []
+        for name, title, check in self.fields:
+            value = form_data.get(name)
+            if _is_empty(value):
+                if name in self.required:
+                    errors.append({'field': name, 'title': title, 'message': 'This answer is required.'})
+                continue
+            try:
+                value = check(value)
+            except ValueError as e:
+                errors.append({'field': name, 'title': title, 'message': f'{str(e)[:1].upper()}{str(e)[1:]}.'})
+                continue
+            if name not in self.pii_fields:
+                payload[name] = value
+        return ValidationResult(payload, errors)
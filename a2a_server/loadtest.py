@@ -0,0 +1,348 @@
+"""Load test for the A2A server with a stub model in place of Gemini.
+
+Simulated applicants each request the questionnaire, submit a filled form and
+wait for the risk report, at increasing levels of concurrency. The server runs
+in this process, either called directly through ASGI or over a localhost
+socket, with `insurance_agent` backed by a deterministic stub model of
+configurable latency. Reports throughput, latency percentiles, memory growth
+and event-loop lag per concurrency level as JSON:
+
+    uv run loadtest.py --concurrency 1 8 32 64 --applicants 200
+    uv run loadtest.py --transport http --llm-latency-ms 1500 --output load.json
+
+No API key or network access is needed. Client and server share one event
+loop, so the loop lag covers both.
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import logging
+import os
+import random
+import resource
+import statistics
+import sys
+import time
+import uuid
+import zlib
+from typing import AsyncGenerator
+
+# Must be set before the server modules are imported: the stub has no quota
+os.environ.setdefault('GEMINI_RPM', '1000000')
+
+import httpx
+import uvicorn
+from google.adk.models import BaseLlm, LlmRequest, LlmResponse
+from google.genai import types
+
+from agent import InsuranceAgent
+from agent_executor import InsuranceAgentExecutor
+from form_schema import get_form_schema
+from main import build_app
+
+YES_NO_CONDITIONS = ['Yes, diagnosed in 2019', 'Yes', 'Under treatment']
+# How often the loop-lag probe wakes up
+LAG_PROBE_SECONDS = 0.01
+
+
+class StubLlm(BaseLlm):
+    """A deterministic stand-in for Gemini that answers after a fixed delay.
+
+    It calls `form_creator` and then `return_form_to_user` when asked for the
+    form, and writes a canned report when given form data, streaming it in
+    chunks when the agent asks for a streamed response. Each response waits
+    `latency_seconds`, varied by up to `jitter_seconds` depending on the request.
+    """
+
+    model: str = 'stub-llm'
+    latency_seconds: float = 0.8
+    jitter_seconds: float = 0.2
+    report_chunks: int = 4
+    calls: int = 0
+
+    async def _wait(self, llm_request: LlmRequest) -> None:
+        key = repr([content.model_dump(exclude_none=True) for content in llm_request.contents[-1:]])
+        spread = (zlib.crc32(key.encode('utf-8')) % 2001 - 1000) / 1000
+        await asyncio.sleep(max(0.0, self.latency_seconds + spread * self.jitter_seconds))
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        self.calls += 1
+        await self._wait(llm_request)
+        last = llm_request.contents[-1] if llm_request.contents else None
+        parts = last.parts if last and last.parts else []
+
+        created = next(
+            (p.function_response for p in parts if p.function_response and p.function_response.name == 'form_creator'),
+            None,
+        )
+        if created is not None:
+            yield LlmResponse(content=types.Content(role='model', parts=[
+                types.Part.from_function_call(name='return_form_to_user', args={'form_schema': created.response}),
+            ]))
+            return
+
+        text = ''.join(p.text for p in parts if p.text)
+        try:
+            submission = json.loads(text)
+        except ValueError:
+            submission = None
+        if not isinstance(submission, dict):
+            yield LlmResponse(content=types.Content(role='model', parts=[
+                types.Part.from_function_call(name='form_creator', args={}),
+            ]))
+            return
+
+        report = self._report(submission)
+        if stream:
+            size = -(-len(report) // self.report_chunks)
+            for start in range(0, len(report), size):
+                yield LlmResponse(
+                    content=types.Content(role='model', parts=[types.Part.from_text(text=report[start:start + size])]),
+                    partial=True,
+                )
+        yield LlmResponse(content=types.Content(role='model', parts=[types.Part.from_text(text=report)]))
+
+    @staticmethod
+    def _report(submission: dict) -> str:
+        profile = submission.get('risk_profile', {})
+        factors = profile.get('factors', [])
+        lines = [
+            'Summary of Information',
+            f"Risk level {profile.get('level', 'unknown')} with a score of {profile.get('score', 'n/a')}.",
+            '',
+            'Identified Risk Factors',
+        ]
+        lines += [f"- {factor['factor']} (+{factor['points']})" for factor in factors] or ['- None identified']
+        return '\n'.join(lines)
+
+
+def build_form_data(rng: random.Random) -> dict:
+    """A valid, randomly filled questionnaire."""
+    schema = get_form_schema().schema
+    age = rng.randint(18, 80)
+    height = rng.randint(150, 195)
+    weight = rng.randint(45, 120)
+    numbers = {
+        'age_ins': age,
+        'height_ins': height,
+        'weight_ins': weight,
+        'bmi_ins': round(weight / (height / 100) ** 2, 1),
+    }
+    form_data = {}
+    for name, spec in schema['properties'].items():
+        if name in numbers:
+            form_data[name] = numbers[name]
+        elif 'enum' in spec:
+            form_data[name] = rng.choice(spec['enum'])
+        elif spec.get('format') == 'date':
+            form_data[name] = f'{2025 - age}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}'
+        elif spec.get('type') == 'number':
+            form_data[name] = rng.randint(1, 100)
+        elif name.endswith('_ins') and name not in ('full_name_ins', 'relationship_ins', 'gender_ins', 'dob_ins'):
+            form_data[name] = rng.choice(YES_NO_CONDITIONS) if rng.random() < 0.15 else 'No'
+        else:
+            form_data[name] = f'Applicant {rng.randint(1, 10 ** 6)}'
+    return form_data
+
+
+def _message_request(context_id: str, text: str) -> dict:
+    return {
+        'jsonrpc': '2.0',
+        'id': str(uuid.uuid4()),
+        'method': 'message/send',
+        'params': {
+            'message': {
+                'role': 'user',
+                'messageId': str(uuid.uuid4()),
+                'contextId': context_id,
+                'parts': [{'kind': 'text', 'text': text}],
+            },
+        },
+    }
+
+
+def _state(response: httpx.Response) -> str:
+    body = response.json()
+    if 'error' in body:
+        return 'error'
+    return body['result'].get('status', {}).get('state', 'message')
+
+
+async def run_applicant(client: httpx.AsyncClient, seed: int) -> dict:
+    """One form-request, form-submit, report flow; returns its step latencies and outcome."""
+    rng = random.Random(seed)
+    context_id = str(uuid.uuid4())
+    started = time.perf_counter()
+    response = await client.post('/', json=_message_request(context_id, 'I want to apply for health insurance.'))
+    form_seconds = time.perf_counter() - started
+    state = _state(response)
+    if state != 'input-required':
+        return {'outcome': state, 'form_seconds': form_seconds}
+
+    submitted = time.perf_counter()
+    response = await client.post(
+        '/', json=_message_request(context_id, json.dumps({'form_data': build_form_data(rng)}))
+    )
+    finished = time.perf_counter()
+    return {
+        'outcome': _state(response),
+        'form_seconds': form_seconds,
+        'submit_seconds': finished - submitted,
+        'flow_seconds': finished - started,
+    }
+
+
+def current_rss_mb() -> float:
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2 ** 20
+    except (OSError, ValueError):
+        # No /proc: fall back to the peak
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 2 ** 20 if sys.platform == 'darwin' else peak / 1024
+
+
+def percentile(values: list[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q / 100 * (len(ordered) - 1))))]
+
+
+def _summary_ms(values: list[float]) -> dict | None:
+    if not values:
+        return None
+    milliseconds = [value * 1000 for value in values]
+    return {
+        'p50': round(percentile(milliseconds, 50), 1),
+        'p95': round(percentile(milliseconds, 95), 1),
+        'p99': round(percentile(milliseconds, 99), 1),
+        'mean': round(statistics.fmean(milliseconds), 1),
+    }
+
+
+async def probe_loop_lag(lags: list[float], stop: asyncio.Event) -> None:
+    """Records how late the event loop wakes this task up."""
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(LAG_PROBE_SECONDS)
+        lags.append(max(0.0, time.perf_counter() - started - LAG_PROBE_SECONDS))
+
+
+async def run_level(client: httpx.AsyncClient, concurrency: int, applicants: int, seed: int) -> dict:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def bounded(index: int) -> dict:
+        async with semaphore:
+            try:
+                return await run_applicant(client, seed * 100003 + index)
+            except httpx.HTTPError as e:
+                return {'outcome': f'http error: {type(e).__name__}'}
+
+    lags: list[float] = []
+    stop = asyncio.Event()
+    probe = asyncio.create_task(probe_loop_lag(lags, stop))
+    rss_start = current_rss_mb()
+    started = time.perf_counter()
+    results = await asyncio.gather(*(bounded(index) for index in range(applicants)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await probe
+
+    outcomes: dict[str, int] = {}
+    for result in results:
+        outcomes[result['outcome']] = outcomes.get(result['outcome'], 0) + 1
+    completed = [result for result in results if result['outcome'] == 'completed']
+    return {
+        'concurrency': concurrency,
+        'applicants': applicants,
+        'outcomes': outcomes,
+        'throughput_flows_per_s': round(len(completed) / elapsed, 2),
+        'latency_ms': {
+            'form': _summary_ms([result['form_seconds'] for result in results if 'form_seconds' in result]),
+            'submit': _summary_ms([result['submit_seconds'] for result in completed]),
+            'flow': _summary_ms([result['flow_seconds'] for result in completed]),
+        },
+        'rss_mb_start': round(rss_start, 1),
+        'rss_mb_end': round(current_rss_mb(), 1),
+        'rss_growth_mb': round(current_rss_mb() - rss_start, 1),
+        'loop_lag_ms': {
+            'p50': round(percentile(lags, 50) * 1000, 2) if lags else None,
+            'p99': round(percentile(lags, 99) * 1000, 2) if lags else None,
+            'max': round(max(lags) * 1000, 2) if lags else None,
+        },
+    }
+
+
+@contextlib.asynccontextmanager
+async def serve(app, transport: str):
+    """Yields a client for the app, called in-process or through a localhost socket."""
+    if transport == 'asgi':
+        async with httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app), base_url='http://loadtest', timeout=None
+        ) as client:
+            yield client
+        return
+
+    server = uvicorn.Server(uvicorn.Config(app, host='127.0.0.1', port=0, log_level='warning'))
+    serving = asyncio.create_task(server.serve())
+    while not server.started:
+        if serving.done():
+            serving.result()
+        await asyncio.sleep(0.01)
+    port = server.servers[0].sockets[0].getsockname()[1]
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+    try:
+        async with httpx.AsyncClient(base_url=f'http://127.0.0.1:{port}', timeout=None, limits=limits) as client:
+            yield client
+    finally:
+        server.should_exit = True
+        await serving
+
+
+async def run(args) -> dict:
+    stub = StubLlm(latency_seconds=args.llm_latency_ms / 1000, jitter_seconds=args.llm_jitter_ms / 1000)
+    executor = InsuranceAgentExecutor(agent=InsuranceAgent(model=stub))
+    app = build_app(None, args.max_finished_tasks, 3600.0, agent_executor=executor)
+    runs = []
+    async with serve(app, args.transport) as client:
+        for level, concurrency in enumerate(args.concurrency):
+            applicants = args.applicants or concurrency * 4
+            calls_before = stub.calls
+            runs.append(await run_level(client, concurrency, applicants, seed=args.seed + level))
+            runs[-1]['model_calls'] = stub.calls - calls_before
+    return {
+        'transport': args.transport,
+        'llm_latency_ms': args.llm_latency_ms,
+        'llm_jitter_ms': args.llm_jitter_ms,
+        'server': executor.stats(),
+        'runs': runs,
+    }
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description='Load test the A2A server with a stub model.')
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 8, 32, 64], help='Concurrent applicants per level')
+    parser.add_argument('--applicants', type=int, default=0, help='Applicants per level; 4x the concurrency if 0')
+    parser.add_argument('--transport', choices=['asgi', 'http'], default='asgi', help='Call the app in-process or over localhost')
+    parser.add_argument('--llm-latency-ms', type=float, default=800.0, help='Stub model response time')
+    parser.add_argument('--llm-jitter-ms', type=float, default=200.0, help='Spread of the stub model response time')
+    parser.add_argument('--max-finished-tasks', type=int, default=1000)
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--output', help='Write the JSON report to this file instead of stdout')
+    args = parser.parse_args()
+
+    logging.getLogger('httpx').setLevel(logging.WARNING)
+    # The server logs every request; keep that out of the JSON report
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        report = asyncio.run(run(args))
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main_cli()
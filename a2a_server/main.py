@@ -1,20 +1,25 @@
+import asyncio
 import logging
 import os
+from contextlib import asynccontextmanager
 
 import click
 
 from a2a.server.apps import A2AStarletteApplication
-from a2a.server.request_handlers import DefaultRequestHandler
-from a2a.server.tasks import InMemoryTaskStore
 from a2a.types import (
     AgentCapabilities,
     AgentCard,
     AgentSkill,
 )
 from dotenv import load_dotenv
+from starlette.requests import Request
+from starlette.responses import JSONResponse
 
+from affinity import ContextAffinityMiddleware
 from agent import InsuranceAgent
 from agent_executor import InsuranceAgentExecutor
+from request_handler import InsuranceRequestHandler
+from task_store import BoundedTaskStore
 
 load_dotenv()
 
@@ -22,43 +27,114 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+def build_app(task_db, max_finished_tasks, finished_task_ttl, agent_executor=None):
+    capabilities = AgentCapabilities(streaming=True)
+    skill = AgentSkill(
+        id='process_insurance_application',
+        name='Process Insurance Application',
+        description='Guides a user through a health questionnaire and generates a risk profile report.',
+        tags=['insurance', 'health', 'report'],
+        examples=[
+            'I want to get a health insurance policy.',
+            'Hi, can you help me with insurance?',
+        ],
+    )
+    agent_card = AgentCard(
+        name='Insurance Agent',
+        description='This agent helps users apply for health insurance.',
+        url=f'YOUR_A2A_SERVER_URL',
+        version='1.0.0',
+        defaultInputModes=InsuranceAgent.SUPPORTED_CONTENT_TYPES,
+        defaultOutputModes=InsuranceAgent.SUPPORTED_CONTENT_TYPES,
+        capabilities=capabilities,
+        skills=[skill],
+    )
+    agent_executor = agent_executor or InsuranceAgentExecutor()
+    task_store = BoundedTaskStore(
+        db_path=task_db,
+        max_finished_tasks=max_finished_tasks,
+        finished_ttl_seconds=finished_task_ttl,
+    )
+    # Lets a task stop when another worker cancels it
+    agent_executor.task_store = task_store
+    request_handler = InsuranceRequestHandler(
+        agent_executor=agent_executor,
+        task_store=task_store,
+    )
+    session_service = agent_executor.agent.session_service
+
+    @asynccontextmanager
+    async def lifespan(app):
+        # Flush pending session writes, expire idle sessions and purge old ones in the background
+        maintenance = asyncio.create_task(session_service.run_maintenance())
+        try:
+            yield
+        finally:
+            maintenance.cancel()
+            await asyncio.gather(maintenance, return_exceptions=True)
+            await session_service.close()
+
+    server = A2AStarletteApplication(
+        agent_card=agent_card, http_handler=request_handler
+    )
+    app = server.build(lifespan=lifespan)
+    app.add_middleware(ContextAffinityMiddleware)
+
+    async def metrics(request: Request) -> JSONResponse:
+        # Per worker process: queue depth and waits, rate limiting, sessions and tasks
+        return JSONResponse({
+            'worker': os.getpid(),
+            **agent_executor.stats(),
+            'tasks': task_store.stats(),
+        })
+
+    app.add_route('/metrics', metrics, methods=['GET'])
+    return app
+
+
+def create_app():
+    """Builds the app in each worker process of `--workers` mode, configured from the environment."""
+    return build_app(
+        os.getenv('TASK_DB_PATH'),
+        int(os.getenv('MAX_FINISHED_TASKS', 1000)),
+        float(os.getenv('FINISHED_TASK_TTL_SECONDS', 3600)),
+    )
+
+
 @click.command()
 @click.option('--host', default='0.0.0.0')
 @click.option('--port', default=10010)
-def main(host, port):
+@click.option('--task-db', envvar='TASK_DB_PATH', default=None, help='SQLite file for persisting tasks; in memory if unset.')
+@click.option('--max-finished-tasks', envvar='MAX_FINISHED_TASKS', default=1000, help='Finished tasks to retain.')
+@click.option('--finished-task-ttl', envvar='FINISHED_TASK_TTL_SECONDS', default=3600.0, help='Seconds to retain a finished task.')
+@click.option('--workers', envvar='A2A_WORKERS', default=1, help='Worker processes; more than one shares state through SQLite.')
+@click.option('--state-dir', envvar='A2A_STATE_DIR', default='a2a_state', help='Directory for the shared SQLite stores in --workers mode.')
+def main(host, port, task_db, max_finished_tasks, finished_task_ttl, workers, state_dir):
     try:
-
-        capabilities = AgentCapabilities(streaming=True)
-        skill = AgentSkill(
-            id='process_insurance_application',
-            name='Process Insurance Application',
-            description='Guides a user through a health questionnaire and generates a risk profile report.',
-            tags=['insurance', 'health', 'report'],
-            examples=[
-                'I want to get a health insurance policy.',
-                'Hi, can you help me with insurance?',
-            ],
-        )
-        agent_card = AgentCard(
-            name='Insurance Agent',
-            description='This agent helps users apply for health insurance.',
-            url=f'YOUR_A2A_SERVER_URL',
-            version='1.0.0',
-            defaultInputModes=InsuranceAgent.SUPPORTED_CONTENT_TYPES,
-            defaultOutputModes=InsuranceAgent.SUPPORTED_CONTENT_TYPES,
-            capabilities=capabilities,
-            skills=[skill],
-        )
-        request_handler = DefaultRequestHandler(
-            agent_executor=InsuranceAgentExecutor(),
-            task_store=InMemoryTaskStore(),
-        )
-        server = A2AStarletteApplication(
-            agent_card=agent_card, http_handler=request_handler
-        )
         import uvicorn
 
-        uvicorn.run(server.build(), host=host, port=port)
+        if workers <= 1:
+            uvicorn.run(
+                build_app(task_db, max_finished_tasks, finished_task_ttl),
+                host=host,
+                port=port,
+            )
+            return
+
+        # Any worker may serve any message of a conversation, so tasks, sessions
+        # and artifacts move to SQLite files shared by all workers. Workers inherit
+        # this environment and build their app from it in create_app.
+        os.makedirs(state_dir, exist_ok=True)
+        os.environ['A2A_SHARED_STATE'] = 'true'
+        # Each worker takes its share of the model quota
+        os.environ['A2A_WORKERS'] = str(workers)
+        os.environ['TASK_DB_PATH'] = task_db or os.path.join(state_dir, 'tasks.sqlite3')
+        os.environ.setdefault('SESSION_DB_PATH', os.path.join(state_dir, 'sessions.sqlite3'))
+        os.environ.setdefault('ARTIFACT_DB_PATH', os.path.join(state_dir, 'artifacts.sqlite3'))
+        os.environ['MAX_FINISHED_TASKS'] = str(max_finished_tasks)
+        os.environ['FINISHED_TASK_TTL_SECONDS'] = str(finished_task_ttl)
+        logger.info(f'Starting {workers} workers with shared state in {state_dir}')
+        uvicorn.run('main:create_app', factory=True, host=host, port=port, workers=workers)
     except Exception as e:
         logger.error(f'An error occurred during server startup: {e}')
         exit(1)
@@ -0,0 +1,86 @@
+import asyncio
+import time
+
+from a2a.server.tasks import TaskUpdater
+from a2a.types import TaskState
+from a2a.utils import new_agent_text_message
+
+
+class ProgressPublisher:
+    """Publishes `working` status updates for a task without flooding the event queue.
+
+    Repeats of the last published text are dropped, updates arriving within
+    `window_seconds` of the previous one are coalesced so only the latest is sent
+    when the window closes, and at most `max_updates` are sent per task. Final
+    state transitions do not go through the publisher; call `close()` before
+    sending them so no late progress update can follow.
+    """
+
+    def __init__(
+        self,
+        updater: TaskUpdater,
+        context_id: str,
+        task_id: str,
+        window_seconds: float = 0.5,
+        max_updates: int = 10,
+    ):
+        self.updater = updater
+        self.context_id = context_id
+        self.task_id = task_id
+        self.window_seconds = window_seconds
+        self.max_updates = max_updates
+        self.sent = 0
+        self.suppressed = 0
+        self._last_text: str | None = None
+        self._last_sent_at = float('-inf')
+        self._pending: str | None = None
+        self._flush_task: asyncio.Task | None = None
+        self._lock = asyncio.Lock()
+        self._closed = False
+
+    async def _send(self, text: str) -> None:
+        self._pending = None
+        if self._closed or text == self._last_text or self.sent >= self.max_updates:
+            self.suppressed += 1
+            return
+        self._last_text = text
+        self._last_sent_at = time.monotonic()
+        self.sent += 1
+        await self.updater.update_status(
+            TaskState.working,
+            new_agent_text_message(text, self.context_id, self.task_id),
+        )
+
+    async def _flush_later(self, delay: float) -> None:
+        await asyncio.sleep(delay)
+        async with self._lock:
+            self._flush_task = None
+            if self._pending is not None:
+                await self._send(self._pending)
+
+    async def publish(self, text: str) -> None:
+        async with self._lock:
+            if self._closed or text == (self._pending or self._last_text):
+                self.suppressed += 1
+                return
+            remaining = self._last_sent_at + self.window_seconds - time.monotonic()
+            if remaining <= 0 and self._pending is None:
+                await self._send(text)
+                return
+            if self._pending is not None:
+                # Superseded by a newer update within the same window
+                self.suppressed += 1
+            self._pending = text
+            if self._flush_task is None:
+                self._flush_task = asyncio.create_task(self._flush_later(max(remaining, 0)))
+
+    async def close(self) -> None:
+        """Drops any pending update and stops publishing."""
+        async with self._lock:
+            self._closed = True
+            if self._pending is not None:
+                self.suppressed += 1
+                self._pending = None
+            if self._flush_task is not None:
+                self._flush_task.cancel()
+                self._flush_task = None
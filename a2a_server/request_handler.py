@@ -0,0 +1,31 @@
+from collections.abc import AsyncGenerator
+
+from a2a.server.context import ServerCallContext
+from a2a.server.events import Event
+from a2a.server.request_handlers import DefaultRequestHandler
+from a2a.types import TaskIdParams, TaskNotFoundError
+from a2a.utils.errors import ServerError
+
+
+class InsuranceRequestHandler(DefaultRequestHandler):
+    """The default request handler, with `tasks/resubscribe` answered from the task store.
+
+    A task's live event queue exists only in the worker process running it. A
+    resubscribe that reaches another worker, or arrives after the task finished,
+    receives the stored task as a single event instead of `TaskNotFoundError`;
+    the client can then poll `tasks/get` or route the resubscribe by affinity.
+    """
+
+    async def on_resubscribe_to_task(
+        self,
+        params: TaskIdParams,
+        context: ServerCallContext | None = None,
+    ) -> AsyncGenerator[Event]:
+        task = await self.task_store.get(params.id)
+        if not task:
+            raise ServerError(error=TaskNotFoundError())
+        if await self._queue_manager.get(task.id) is None:
+            yield task
+            return
+        async for event in super().on_resubscribe_to_task(params, context):
+            yield event
@@ -0,0 +1,202 @@
+import math
+from dataclasses import dataclass
+from typing import Any, Mapping, Sequence
+
+import numpy as np
+
+# Age bands: under 30, 30-44, 45-59, 60 and over
+AGE_BAND_EDGES = np.array([30.0, 45.0, 60.0])
+AGE_BAND_LABELS = ('under 30', '30-44', '45-59', '60 and over')
+AGE_BAND_POINTS = np.array([0, 1, 2, 3])
+
+# WHO adult BMI categories
+BMI_EDGES = np.array([18.5, 25.0, 30.0])
+BMI_LABELS = ('underweight', 'healthy weight', 'overweight', 'obese')
+BMI_POINTS = np.array([1, 0, 1, 2])
+
+# Yes/no questions of the form: field -> (risk factor, points when answered yes)
+DECLARATIONS = {
+    'smoker_ins': ('Tobacco use', 3),
+    'alcoholic_ins': ('Alcohol consumption', 1),
+    'heart_ailment_ins': ('High blood pressure or heart ailment', 3),
+    'cancer_ins': ('Cancer, tumor or growth', 3),
+    'hormonal_ailments_ins': ('Diabetes, thyroid or other hormonal disorder', 2),
+    'neurological_ailments_ins': ('Stroke, epilepsy or other neurological disorder', 2),
+    'respiratory_ailments_ins': ('Asthma, TB or other respiratory disorder', 2),
+    'liver_ailments_ins': ('Ulcer, hepatitis or other gastrointestinal/liver disorder', 2),
+    'sexual_ailments_ins': ('HIV/AIDS or other STD', 2),
+    'bone_ailments_ins': ('Arthritis, gout or other joint/bone/spine disorder', 1),
+    'eye_ailments_ins': ('Cataract, glaucoma or other eye disorder', 1),
+    'pcod_ailments_ins': ('Pregnancy or breast/reproductive disorder', 1),
+    'recent_surgery_ins': ('Surgery, hospitalization or accident in the last 5 years', 2),
+    'medications_ins': ('Regular medication', 1),
+}
+DECLARATION_FIELDS = tuple(DECLARATIONS)
+DECLARATION_POINTS = np.array([points for _, points in DECLARATIONS.values()])
+
+# Total score from which each level starts: low, moderate, high
+RISK_LEVEL_EDGES = np.array([3, 6])
+RISK_LEVELS = ('low', 'moderate', 'high')
+
+# Every field the scorer consumes; the rest of a submission is passed on as is
+SCORED_FIELDS = frozenset({'age_ins', 'height_ins', 'weight_ins', 'bmi_ins', *DECLARATION_FIELDS})
+
+NEGATIVE_ANSWERS = frozenset({
+    '', 'no', 'n', 'none', 'nil', 'na', 'n/a', 'not applicable', 'never', 'false', '-',
+})
+BARE_AFFIRMATIVE_ANSWERS = frozenset({'yes', 'y', 'true'})
+# What follows a leading "yes"/"no" when the applicant adds details: "Yes, since 2019"
+ANSWER_DETAIL_SEPARATORS = (' ', ',', '-', ':', ';', '.', '(')
+# Longest free-text detail kept for a declared factor
+MAX_DETAIL_CHARS = 200
+
+
+def _number(value: Any) -> float:
+    if isinstance(value, bool):
+        return math.nan
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        try:
+            return float(value.strip())
+        except ValueError:
+            return math.nan
+    return math.nan
+
+
+def _normalize_answer(value: Any) -> str:
+    if isinstance(value, bool):
+        return 'yes' if value else 'no'
+    if value is None:
+        return ''
+    return ' '.join(str(value).split()).lower().rstrip('.')
+
+
+def _starts_with_word(answer: str, word: str) -> bool:
+    return answer.startswith(word) and answer[len(word):len(word) + 1] in ANSWER_DETAIL_SEPARATORS
+
+
+def classify_answer(value: Any) -> bool | None:
+    """Reads a free-text answer to a yes/no question: True for yes, False for no, None if unclear.
+
+    Only explicit answers are classified: "yes", "Yes, since 2019", "no",
+    "No, never". Anything else ("Never smoked", "Quit 10 years ago",
+    "occasionally") is left for the report model to interpret.
+    """
+    answer = _normalize_answer(value)
+    if answer in BARE_AFFIRMATIVE_ANSWERS or _starts_with_word(answer, 'yes'):
+        return True
+    if answer in NEGATIVE_ANSWERS or _starts_with_word(answer, 'no'):
+        return False
+    return None
+
+
+@dataclass(frozen=True)
+class RiskProfile:
+    """The precomputed risk factors of one submission."""
+
+    score: int
+    level: str
+    age: float | None
+    age_band: str | None
+    bmi: float | None
+    bmi_category: str | None
+    # One {'factor', 'points'} entry per contributing factor, with the
+    # applicant's own words as 'detail' when they said more than yes
+    factors: tuple[dict[str, Any], ...]
+    # One unscored {'factor', 'detail'} entry per yes/no question answered
+    # neither yes nor no, for the report to interpret
+    unclear_answers: tuple[dict[str, Any], ...] = ()
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            'score': self.score,
+            'level': self.level,
+            'age': self.age,
+            'age_band': self.age_band,
+            'bmi': self.bmi,
+            'bmi_category': self.bmi_category,
+            'factors': list(self.factors),
+            'unclear_answers': list(self.unclear_answers),
+        }
+
+
+def score_submissions(submissions: Sequence[Mapping[str, Any]]) -> list[RiskProfile]:
+    """Scores many form submissions at once.
+
+    Answers are parsed per submission, then BMI, age and BMI bands, declaration
+    points and risk levels are computed for the whole batch with array operations.
+    BMI is derived from height (cm) and weight (kg) when both are given, falling
+    back to the declared BMI. Unknown ages and BMIs add no points.
+    """
+    if not submissions:
+        return []
+    ages = np.array([_number(s.get('age_ins')) for s in submissions])
+    heights = np.array([_number(s.get('height_ins')) for s in submissions])
+    weights = np.array([_number(s.get('weight_ins')) for s in submissions])
+    declared_bmis = np.array([_number(s.get('bmi_ins')) for s in submissions])
+    answers = [[classify_answer(s.get(name)) for name in DECLARATION_FIELDS] for s in submissions]
+    declared = np.array([[answer is True for answer in row] for row in answers], dtype=bool)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        computed_bmis = weights / np.square(heights / 100.0)
+    bmis = np.where((heights > 0) & (weights > 0), computed_bmis, declared_bmis)
+    bmis[~(bmis > 0)] = np.nan
+
+    age_known = ages >= 0
+    age_bands = np.digitize(ages, AGE_BAND_EDGES)
+    age_points = np.where(age_known, AGE_BAND_POINTS[age_bands], 0)
+    bmi_known = ~np.isnan(bmis)
+    bmi_bands = np.digitize(bmis, BMI_EDGES)
+    bmi_points = np.where(bmi_known, BMI_POINTS[bmi_bands], 0)
+    scores = age_points + bmi_points + declared.astype(np.int64) @ DECLARATION_POINTS
+    levels = np.digitize(scores, RISK_LEVEL_EDGES)
+
+    profiles = []
+    for row, submission in enumerate(submissions):
+        factors = []
+        if age_known[row] and age_points[row]:
+            factors.append({'factor': f'Age {AGE_BAND_LABELS[age_bands[row]]}', 'points': int(age_points[row])})
+        if bmi_known[row] and bmi_points[row]:
+            factors.append({
+                'factor': f'BMI {bmis[row]:.1f} ({BMI_LABELS[bmi_bands[row]]})',
+                'points': int(bmi_points[row]),
+            })
+        for column in np.flatnonzero(declared[row]):
+            name = DECLARATION_FIELDS[column]
+            factor = {'factor': DECLARATIONS[name][0], 'points': int(DECLARATION_POINTS[column])}
+            answer = ' '.join(str(submission.get(name, '')).split())
+            if _normalize_answer(answer) not in BARE_AFFIRMATIVE_ANSWERS:
+                factor['detail'] = answer[:MAX_DETAIL_CHARS]
+            factors.append(factor)
+        unclear_answers = tuple(
+            {
+                'factor': DECLARATIONS[name][0],
+                'detail': ' '.join(str(submission.get(name, '')).split())[:MAX_DETAIL_CHARS],
+            }
+            for name, answer in zip(DECLARATION_FIELDS, answers[row])
+            if answer is None
+        )
+        profiles.append(RiskProfile(
+            score=int(scores[row]),
+            level=RISK_LEVELS[levels[row]],
+            age=float(ages[row]) if age_known[row] else None,
+            age_band=AGE_BAND_LABELS[age_bands[row]] if age_known[row] else None,
+            bmi=round(float(bmis[row]), 1) if bmi_known[row] else None,
+            bmi_category=BMI_LABELS[bmi_bands[row]] if bmi_known[row] else None,
+            factors=tuple(factors),
+            unclear_answers=unclear_answers,
+        ))
+    return profiles
+
+
+def score_submission(submission: Mapping[str, Any]) -> RiskProfile:
+    return score_submissions([submission])[0]
+
+
+def model_input(submission: Mapping[str, Any]) -> dict[str, Any]:
+    """The compact input for the report: the risk profile plus any answers it does not cover."""
+    return {
+        'answers': {name: value for name, value in submission.items() if name not in SCORED_FIELDS},
+        'risk_profile': score_submission(submission).as_dict(),
+    }
@@ -0,0 +1,271 @@
+import asyncio
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Optional
+
+from google.adk.events import Event
+from google.adk.sessions import InMemorySessionService, Session
+
+SessionKey = tuple[str, str, str]
+
+
+class SqliteSessionStore:
+    """Stores serialized ADK sessions in a SQLite file."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS sessions ('
+            ' app_name TEXT NOT NULL, user_id TEXT NOT NULL, session_id TEXT NOT NULL,'
+            ' updated_at REAL NOT NULL, payload TEXT NOT NULL,'
+            ' PRIMARY KEY (app_name, user_id, session_id))'
+        )
+        self._conn.execute('CREATE INDEX IF NOT EXISTS sessions_updated_at ON sessions (updated_at)')
+        self._conn.commit()
+
+    def load(self, key: SessionKey) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT payload FROM sessions WHERE app_name = ? AND user_id = ? AND session_id = ?', key
+            ).fetchone()
+        return row[0] if row else None
+
+    def save_many(self, rows: list[tuple[str, str, str, float, str]]) -> None:
+        with self._lock:
+            self._conn.executemany('INSERT OR REPLACE INTO sessions VALUES (?, ?, ?, ?, ?)', rows)
+            self._conn.commit()
+
+    def delete(self, key: SessionKey) -> None:
+        with self._lock:
+            self._conn.execute(
+                'DELETE FROM sessions WHERE app_name = ? AND user_id = ? AND session_id = ?', key
+            )
+            self._conn.commit()
+
+    def delete_older_than(self, timestamp: float) -> int:
+        with self._lock:
+            deleted = self._conn.execute('DELETE FROM sessions WHERE updated_at < ?', (timestamp,)).rowcount
+            self._conn.commit()
+        return deleted
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class BoundedSessionService(InMemorySessionService):
+    """An in-memory ADK session service with an idle TTL, an LRU cap and optional SQLite persistence.
+
+    Sessions idle for longer than `idle_ttl_seconds` and the least recently used
+    sessions beyond `max_sessions` are evicted from memory. With a `store`,
+    modified sessions are written back in batches of `write_batch_size` (or every
+    `flush_interval_seconds`), evicted sessions are reloaded on their next access
+    and in-flight questionnaires survive restarts; without one, eviction ends the session.
+    With `shared`, several worker processes use the same store: every change is
+    written through and every read reloads the session from the store.
+
+    Run `run_maintenance` as a background task so pending writes are flushed and
+    idle sessions expire even without traffic, and stored sessions not updated
+    within `retention_seconds` are purged every `purge_interval_seconds`. Call
+    `close` at shutdown to write the last changes.
+    """
+
+    def __init__(
+        self,
+        max_sessions: int = 1000,
+        idle_ttl_seconds: float = 3600,
+        store: Optional[SqliteSessionStore] = None,
+        write_batch_size: int = 20,
+        flush_interval_seconds: float = 2.0,
+        retention_seconds: float = 7 * 24 * 3600,
+        purge_interval_seconds: float = 3600,
+        on_evict: Optional[Callable[[str, str, str], Awaitable[None]]] = None,
+        shared: bool = False,
+    ):
+        super().__init__()
+        if shared and store is None:
+            raise ValueError('A shared session service needs a store')
+        self.max_sessions = max_sessions
+        self.idle_ttl_seconds = idle_ttl_seconds
+        self.store = store
+        self.write_batch_size = write_batch_size
+        self.flush_interval_seconds = flush_interval_seconds
+        self.retention_seconds = retention_seconds
+        self.purge_interval_seconds = purge_interval_seconds
+        self.on_evict = on_evict
+        self.shared = shared
+        if shared:
+            self.write_batch_size = 1
+        # Ordered from least to most recently used
+        self._last_access: OrderedDict[SessionKey, float] = OrderedDict()
+        self._dirty: set[SessionKey] = set()
+        self._last_flush = time.monotonic()
+        self.evictions = 0
+        self.expirations = 0
+        self.restored = 0
+        self.flushes = 0
+        self.purged = 0
+
+    def _storage_session(self, key: SessionKey) -> Optional[Session]:
+        app_name, user_id, session_id = key
+        return self.sessions.get(app_name, {}).get(user_id, {}).get(session_id)
+
+    def _touch(self, key: SessionKey) -> None:
+        self._last_access[key] = time.monotonic()
+        self._last_access.move_to_end(key)
+
+    async def _evict(self, key: SessionKey) -> None:
+        if key in self._dirty:
+            await self.flush()
+        self._last_access.pop(key, None)
+        app_name, user_id, session_id = key
+        user_sessions = self.sessions.get(app_name, {}).get(user_id, {})
+        user_sessions.pop(session_id, None)
+        if not user_sessions:
+            self.sessions.get(app_name, {}).pop(user_id, None)
+        if self.on_evict is not None:
+            await self.on_evict(app_name, user_id, session_id)
+
+    async def _enforce_limits(self) -> None:
+        now = time.monotonic()
+        while self._last_access:
+            key, last_access = next(iter(self._last_access.items()))
+            if now - last_access > self.idle_ttl_seconds:
+                self.expirations += 1
+            elif len(self._last_access) > self.max_sessions:
+                self.evictions += 1
+            else:
+                break
+            await self._evict(key)
+
+    async def _restore(self, key: SessionKey) -> bool:
+        if self.store is None:
+            return False
+        payload = await asyncio.to_thread(self.store.load, key)
+        if payload is None:
+            return False
+        app_name, user_id, session_id = key
+        session = Session.model_validate_json(payload)
+        self.sessions.setdefault(app_name, {}).setdefault(user_id, {})[session_id] = session
+        self.restored += 1
+        return True
+
+    async def _mark_dirty(self, key: SessionKey) -> None:
+        if self.store is None:
+            return
+        self._dirty.add(key)
+        if (
+            len(self._dirty) >= self.write_batch_size
+            or time.monotonic() - self._last_flush >= self.flush_interval_seconds
+        ):
+            await self.flush()
+
+    async def flush(self) -> None:
+        """Writes every modified session to the store in one transaction."""
+        self._last_flush = time.monotonic()
+        if self.store is None or not self._dirty:
+            return
+        keys = set(self._dirty)
+        self._dirty.clear()
+        rows = []
+        for key in keys:
+            session = self._storage_session(key)
+            if session is not None:
+                rows.append((*key, session.last_update_time, session.model_dump_json()))
+        try:
+            await asyncio.to_thread(self.store.save_many, rows)
+        except Exception:
+            # Keep them for the next flush
+            self._dirty |= keys
+            raise
+        self.flushes += 1
+
+    async def create_session(self, *, app_name: str, user_id: str, state: Optional[dict[str, Any]] = None, session_id: Optional[str] = None) -> Session:
+        session = await super().create_session(
+            app_name=app_name, user_id=user_id, state=state, session_id=session_id
+        )
+        key = (app_name, user_id, session.id)
+        self._touch(key)
+        await self._mark_dirty(key)
+        await self._enforce_limits()
+        return session
+
+    async def get_session(self, *, app_name: str, user_id: str, session_id: str, **kwargs) -> Optional[Session]:
+        await self._enforce_limits()
+        key = (app_name, user_id, session_id)
+        if self.shared or self._storage_session(key) is None:
+            # Another worker may have changed the session, so the stored copy wins
+            if not await self._restore(key) and self._storage_session(key) is None:
+                return None
+        self._touch(key)
+        await self._enforce_limits()
+        return await super().get_session(
+            app_name=app_name, user_id=user_id, session_id=session_id, **kwargs
+        )
+
+    async def append_event(self, session: Session, event: Event) -> Event:
+        key = (session.app_name, session.user_id, session.id)
+        if self._storage_session(key) is None:
+            # Evicted between get_session and append_event: bring it back first
+            await self._restore(key)
+        event = await super().append_event(session=session, event=event)
+        if not event.partial:
+            self._touch(key)
+            await self._mark_dirty(key)
+        return event
+
+    async def delete_session(self, *, app_name: str, user_id: str, session_id: str) -> None:
+        key = (app_name, user_id, session_id)
+        self._last_access.pop(key, None)
+        self._dirty.discard(key)
+        await super().delete_session(app_name=app_name, user_id=user_id, session_id=session_id)
+        if self.store is not None:
+            await asyncio.to_thread(self.store.delete, key)
+
+    async def purge_expired(self) -> int:
+        """Drops persisted sessions not updated within `retention_seconds`."""
+        await self._enforce_limits()
+        if self.store is None:
+            return 0
+        return await asyncio.to_thread(self.store.delete_older_than, time.time() - self.retention_seconds)
+
+    async def run_maintenance(self) -> None:
+        """Flushes, expires and purges sessions on a timer until canceled."""
+        last_purge = None
+        while True:
+            try:
+                if time.monotonic() - self._last_flush >= self.flush_interval_seconds:
+                    await self.flush()
+                await self._enforce_limits()
+                if last_purge is None or time.monotonic() - last_purge >= self.purge_interval_seconds:
+                    last_purge = time.monotonic()
+                    self.purged += await self.purge_expired()
+            except Exception as e:
+                # Retried on the next tick; pending writes stay marked dirty until then
+                print(f'session maintenance failed: {e}')
+            await asyncio.sleep(self.flush_interval_seconds)
+
+    async def close(self) -> None:
+        """Writes pending changes and closes the store."""
+        await self.flush()
+        if self.store is not None:
+            await asyncio.to_thread(self.store.close)
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            'live_sessions': len(self._last_access),
+            'max_sessions': self.max_sessions,
+            'evictions': self.evictions,
+            'expirations': self.expirations,
+            'restored': self.restored,
+            'pending_writes': len(self._dirty),
+            'flushes': self.flushes,
+            'purged': self.purged,
+            'persistent': self.store is not None,
+            'shared': self.shared,
+        }
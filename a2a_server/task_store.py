@@ -0,0 +1,205 @@
+import asyncio
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+
+from a2a.server.tasks import TaskStore
+from a2a.types import Task, TaskState
+
+FINISHED_STATES = (
+    TaskState.completed,
+    TaskState.failed,
+    TaskState.canceled,
+    TaskState.rejected,
+)
+# Retention is enforced once every this many saves
+PRUNE_EVERY = 50
+
+
+def _is_finished(task: Task) -> bool:
+    return task.status.state in FINISHED_STATES
+
+
+def _changes_final_state(stored: Task, task: Task) -> bool:
+    return _is_finished(stored) and task.status.state != stored.status.state
+
+
+class BoundedTaskStore(TaskStore):
+    """A task store that keeps only a bounded number of finished tasks.
+
+    Completed, failed, canceled and rejected tasks are kept for at most
+    `finished_ttl_seconds` and only the newest `max_finished_tasks` of them;
+    tasks still in progress or waiting for input are dropped after
+    `active_ttl_seconds` without an update. With `db_path`, tasks are stored in
+    SQLite as zlib-compressed JSON, indexed by task and context ID, so they
+    survive restarts and stay out of the Python heap.
+
+    A finished state is final: a save that would move a finished task to another
+    state is ignored. With several workers, a task canceled by one worker
+    therefore stays canceled even if the worker running it saves a later result.
+    """
+
+    def __init__(
+        self,
+        db_path: str | None = None,
+        max_finished_tasks: int = 1000,
+        finished_ttl_seconds: float = 3600,
+        active_ttl_seconds: float = 24 * 3600,
+    ):
+        self.db_path = db_path
+        self.max_finished_tasks = max_finished_tasks
+        self.finished_ttl_seconds = finished_ttl_seconds
+        self.active_ttl_seconds = active_ttl_seconds
+        self._saves = 0
+        self.pruned = 0
+        self.kept_final = 0
+        self._lock = threading.Lock()
+        # In-memory mode: task_id -> (task, updated_at), ordered by last update
+        self._tasks: OrderedDict[str, tuple[Task, float]] = OrderedDict()
+        self._conn = None
+        if db_path:
+            self._conn = sqlite3.connect(db_path, check_same_thread=False)
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute(
+                'CREATE TABLE IF NOT EXISTS tasks ('
+                ' task_id TEXT PRIMARY KEY, context_id TEXT NOT NULL, finished INTEGER NOT NULL,'
+                ' updated_at REAL NOT NULL, payload BLOB NOT NULL)'
+            )
+            self._conn.execute('CREATE INDEX IF NOT EXISTS tasks_context_id ON tasks (context_id)')
+            self._conn.execute('CREATE INDEX IF NOT EXISTS tasks_finished_updated_at ON tasks (finished, updated_at)')
+            self._conn.commit()
+
+    @staticmethod
+    def _encode(task: Task) -> bytes:
+        return zlib.compress(task.model_dump_json(exclude_none=True).encode('utf-8'))
+
+    @staticmethod
+    def _decode(payload: bytes) -> Task:
+        return Task.model_validate_json(zlib.decompress(payload))
+
+    def _save_sync(self, task: Task) -> None:
+        now = time.time()
+        with self._lock:
+            if self._conn is None:
+                entry = self._tasks.get(task.id)
+                if entry and _changes_final_state(entry[0], task):
+                    self.kept_final += 1
+                    return
+                self._tasks[task.id] = (task, now)
+                self._tasks.move_to_end(task.id)
+            elif not self._save_unless_finished(task, now):
+                self.kept_final += 1
+                return
+            self._saves += 1
+            if self._saves % PRUNE_EVERY == 0:
+                self._prune_locked(now)
+
+    def _save_unless_finished(self, task: Task, now: float) -> bool:
+        # Other workers write the same file, so check and write in one transaction
+        self._conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = self._conn.execute(
+                'SELECT payload FROM tasks WHERE task_id = ? AND finished = 1', (task.id,)
+            ).fetchone()
+            if row and _changes_final_state(self._decode(row[0]), task):
+                self._conn.rollback()
+                return False
+            self._conn.execute(
+                'INSERT OR REPLACE INTO tasks VALUES (?, ?, ?, ?, ?)',
+                (task.id, task.contextId, int(_is_finished(task)), now, self._encode(task)),
+            )
+            self._conn.commit()
+        except BaseException:
+            self._conn.rollback()
+            raise
+        return True
+
+    def _prune_locked(self, now: float) -> None:
+        if self._conn is None:
+            finished = []
+            for task_id, (task, updated_at) in list(self._tasks.items()):
+                ttl = self.finished_ttl_seconds if _is_finished(task) else self.active_ttl_seconds
+                if now - updated_at > ttl:
+                    del self._tasks[task_id]
+                    self.pruned += 1
+                elif _is_finished(task):
+                    finished.append(task_id)
+            # `finished` is ordered oldest first
+            for task_id in finished[:max(0, len(finished) - self.max_finished_tasks)]:
+                del self._tasks[task_id]
+                self.pruned += 1
+            return
+        deleted = self._conn.execute(
+            'DELETE FROM tasks WHERE (finished = 1 AND updated_at < ?) OR (finished = 0 AND updated_at < ?)',
+            (now - self.finished_ttl_seconds, now - self.active_ttl_seconds),
+        ).rowcount
+        deleted += self._conn.execute(
+            'DELETE FROM tasks WHERE task_id IN (SELECT task_id FROM tasks WHERE finished = 1'
+            ' ORDER BY updated_at DESC LIMIT -1 OFFSET ?)',
+            (self.max_finished_tasks,),
+        ).rowcount
+        self._conn.commit()
+        self.pruned += deleted
+
+    def _get_sync(self, task_id: str) -> Task | None:
+        with self._lock:
+            if self._conn is None:
+                entry = self._tasks.get(task_id)
+                return entry[0] if entry else None
+            row = self._conn.execute('SELECT payload FROM tasks WHERE task_id = ?', (task_id,)).fetchone()
+        return self._decode(row[0]) if row else None
+
+    def _get_by_context_sync(self, context_id: str) -> list[Task]:
+        with self._lock:
+            if self._conn is None:
+                return [task for task, _ in self._tasks.values() if task.contextId == context_id]
+            rows = self._conn.execute(
+                'SELECT payload FROM tasks WHERE context_id = ? ORDER BY updated_at', (context_id,)
+            ).fetchall()
+        return [self._decode(row[0]) for row in rows]
+
+    def _delete_sync(self, task_id: str) -> None:
+        with self._lock:
+            if self._conn is None:
+                self._tasks.pop(task_id, None)
+            else:
+                self._conn.execute('DELETE FROM tasks WHERE task_id = ?', (task_id,))
+                self._conn.commit()
+
+    async def save(self, task: Task) -> None:
+        if self._conn is None:
+            self._save_sync(task)
+        else:
+            await asyncio.to_thread(self._save_sync, task)
+
+    async def get(self, task_id: str) -> Task | None:
+        if self._conn is None:
+            return self._get_sync(task_id)
+        return await asyncio.to_thread(self._get_sync, task_id)
+
+    async def get_by_context(self, context_id: str) -> list[Task]:
+        """Returns every stored task of a context, oldest first."""
+        if self._conn is None:
+            return self._get_by_context_sync(context_id)
+        return await asyncio.to_thread(self._get_by_context_sync, context_id)
+
+    async def delete(self, task_id: str) -> None:
+        if self._conn is None:
+            self._delete_sync(task_id)
+        else:
+            await asyncio.to_thread(self._delete_sync, task_id)
+
+    def stats(self) -> dict:
+        with self._lock:
+            if self._conn is None:
+                stored = len(self._tasks)
+            else:
+                stored = self._conn.execute('SELECT COUNT(*) FROM tasks').fetchone()[0]
+        return {
+            'stored_tasks': stored,
+            'pruned': self.pruned,
+            'kept_final': self.kept_final,
+            'persistent': self._conn is not None,
+        }
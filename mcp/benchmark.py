@@ -0,0 +1,239 @@
+"""Retrieval quality and latency benchmark for the policy-finder.
+
+Builds synthetic policy corpora of several sizes with the deterministic local
+embedder, ingests them with the ingestion CLI code, and replays a labeled query
+set through the `get_insurance_plan` tool. Reports recall@k, MRR, latency
+percentiles and throughput as JSON:
+
+    uv run benchmark.py --sizes 100 1000 5000 --output bench.json
+    uv run benchmark.py --sizes 100 1000 5000 --baseline bench.json
+    uv run benchmark.py --backends chroma numpy
+
+No API key or network access is needed.
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import random
+import resource
+import statistics
+import sys
+import tempfile
+import time
+
+# Must be set before main.py is imported: keep everything local and uncached
+os.environ.setdefault("EMBEDDING_BACKEND", "local")
+os.environ.setdefault("EMBEDDING_CACHE_PATH", "")
+os.environ.setdefault("WARMUP_ON_START", "false")
+
+import chromadb
+
+import main
+from embeddings import embedding_function_from_env
+from ingest import ingest
+from retrieval import PolicyRetriever
+from result_cache import SemanticResultCache, ThrottledFingerprint, collection_fingerprint
+from vector_index import NumpyCollection
+
+PLAN_TYPES = ["individual", "family floater", "senior citizen", "group", "top-up"]
+BENEFITS = [
+    "maternity", "newborn", "opd", "dental", "vision", "ayush", "daycare", "ambulance",
+    "organ donor", "mental illness", "home healthcare", "air ambulance", "wellness",
+    "critical illness", "personal accident", "restore benefit", "no claim bonus",
+]
+CONDITIONS = [
+    "diabetes", "hypertension", "asthma", "thyroid", "cancer", "cardiac", "kidney",
+    "arthritis", "obesity", "epilepsy", "hepatitis", "copd",
+]
+FILLER = [
+    "Cashless treatment at network hospitals.", "Lifelong renewability is available.",
+    "Pre and post hospitalization expenses are covered.", "Premiums are eligible for tax benefits.",
+    "Room rent is covered up to the single private room.", "Claims are settled within thirty days.",
+]
+
+
+def build_corpus(size: int, seed: int = 7) -> list[dict]:
+    rng = random.Random(seed)
+    plans = []
+    for index in range(size):
+        benefits = rng.sample(BENEFITS, 3)
+        conditions = rng.sample(CONDITIONS, 2)
+        plan_type = rng.choice(PLAN_TYPES)
+        description = (
+            f"A {plan_type} health insurance plan covering {', '.join(benefits)}. "
+            f"Pre-existing {conditions[0]} and {conditions[1]} are covered after the waiting period. "
+            + " ".join(rng.sample(FILLER, 3))
+        )
+        plans.append({
+            "id": f"plan-{index}",
+            "name": f"Synthetic Plan {index}",
+            "description": description,
+            "plan_type": plan_type,
+            "sum_insured": rng.choice([300000, 500000, 1000000, 2500000, 10000000]),
+            "waiting_period_months": rng.choice([0, 12, 24, 36, 48]),
+            "features": sorted(benefits + conditions + [plan_type]),
+        })
+    return plans
+
+
+def build_queries(plans: list[dict], count: int, seed: int = 11) -> list[dict]:
+    """Builds queries from feature subsets; every plan holding all those features is relevant."""
+    rng = random.Random(seed)
+    queries = []
+    for _ in range(count):
+        target = rng.choice(plans)
+        features = rng.sample(target["features"], 3)
+        relevant = [plan["id"] for plan in plans if set(features) <= set(plan["features"])]
+        queries.append({
+            "query": f"health insurance with {features[0]}, {features[1]} and {features[2]} cover",
+            "relevant": relevant,
+        })
+    return queries
+
+
+def percentile(values: list[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q / 100 * (len(ordered) - 1))))]
+
+
+async def replay(queries: list[dict], top_k: int, concurrency: int) -> dict:
+    tool = getattr(main.get_insurance_plan, "fn", main.get_insurance_plan)
+    latencies, recalls, reciprocal_ranks = [], [], []
+
+    for labeled in queries:
+        started_at = time.perf_counter()
+        result = await tool(labeled["query"], top_k=top_k, fields=["id"], max_chars=0)
+        latencies.append((time.perf_counter() - started_at) * 1000)
+        ranked = [plan["id"] for plan in result["plans"]]
+        relevant = set(labeled["relevant"])
+        found = relevant.intersection(ranked)
+        recalls.append(len(found) / min(len(relevant), top_k))
+        first = next((rank for rank, plan_id in enumerate(ranked, start=1) if plan_id in relevant), None)
+        reciprocal_ranks.append(1 / first if first else 0.0)
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def bounded(labeled):
+        async with semaphore:
+            await tool(labeled["query"], top_k=top_k, fields=["id"], max_chars=0)
+
+    started_at = time.perf_counter()
+    await asyncio.gather(*(bounded(labeled) for labeled in queries))
+    elapsed = time.perf_counter() - started_at
+
+    return {
+        f"recall@{top_k}": round(statistics.fmean(recalls), 4),
+        "mrr": round(statistics.fmean(reciprocal_ranks), 4),
+        "latency_ms": {
+            "p50": round(percentile(latencies, 50), 3),
+            "p95": round(percentile(latencies, 95), 3),
+            "p99": round(percentile(latencies, 99), 3),
+            "mean": round(statistics.fmean(latencies), 3),
+        },
+        "throughput_qps": round(len(queries) / elapsed, 2),
+        "concurrency": concurrency,
+    }
+
+
+def run_size(size: int, backend: str, query_count: int, top_k: int, concurrency: int, workdir: str) -> dict:
+    source_dir = os.path.join(workdir, f"corpus-{size}-{backend}")
+    db_path = os.path.join(workdir, f"db-{size}-{backend}")
+    os.makedirs(source_dir)
+    plans = build_corpus(size)
+    with open(os.path.join(source_dir, "plans.jsonl"), "w", encoding="utf-8") as f:
+        for plan in plans:
+            record = {key: value for key, value in plan.items() if key != "features"}
+            f.write(json.dumps(record) + "\n")
+
+    embedding_function = embedding_function_from_env()
+    stats = ingest(source_dir, db_path=db_path, embedding_function=embedding_function)
+    ingest_seconds = time.perf_counter() - stats.started_at
+    # Ingested ids are "<file>:<record id>#<chunk>", map them back to plan ids for scoring
+    collection = chromadb.PersistentClient(path=db_path).get_collection(
+        "insurance_plan_details", embedding_function=embedding_function
+    )
+    fingerprint = ThrottledFingerprint(lambda: collection_fingerprint(db_path))
+    search_collection = collection
+    if backend == "numpy":
+        search_collection = NumpyCollection(collection, f"{db_path}_numpy", fingerprint)
+    main.use_retriever(PolicyRetriever(
+        search_collection,
+        embedding_function,
+        # Result cache disabled so every query measures the full retrieval path
+        result_cache=SemanticResultCache(max_entries=0),
+        fingerprint=fingerprint,
+    ))
+    queries = build_queries(plans, query_count)
+    for labeled in queries:
+        labeled["relevant"] = [f"plans.jsonl:{plan_id}#0" for plan_id in labeled["relevant"]]
+    metrics = asyncio.run(replay(queries, top_k, concurrency))
+    return {
+        "corpus_size": size,
+        "backend": backend,
+        "queries": query_count,
+        "ingest_chunks_per_s": round(stats.chunks / ingest_seconds, 1) if ingest_seconds else None,
+        **metrics,
+        "index_bytes": search_collection.stats() if backend == "numpy" else None,
+        # Peak for the whole process so far, so compare backends in separate runs
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    }
+
+
+def _flatten(run: dict) -> dict:
+    flat = {key: value for key, value in run.items() if key != "latency_ms"}
+    flat.update({f"latency_{key}": value for key, value in run["latency_ms"].items()})
+    return flat
+
+
+def compare(current: dict, baseline: dict) -> None:
+    """Prints the relative change of every metric against a previous run."""
+    previous = {(run["corpus_size"], run.get("backend", "chroma")): _flatten(run) for run in baseline["runs"]}
+    for run in current["runs"]:
+        before = previous.get((run["corpus_size"], run["backend"]))
+        if not before:
+            continue
+        changes = []
+        for key, value in _flatten(run).items():
+            old = before.get(key)
+            if key != "corpus_size" and isinstance(value, (int, float)) and isinstance(old, (int, float)) and old:
+                changes.append(f"{key} {(value - old) / old * 100:+.1f}%")
+        print(f"size {run['corpus_size']} ({run['backend']}): " + ", ".join(changes), file=sys.stderr)
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="Benchmark policy-finder retrieval quality and latency.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 5000], help="Corpus sizes to benchmark")
+    parser.add_argument("--backends", nargs="+", choices=["chroma", "numpy"], default=["chroma"], help="Dense search backends to compare")
+    parser.add_argument("--queries", type=int, default=200, help="Labeled queries per corpus size")
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--concurrency", type=int, default=8, help="Concurrent queries for the throughput run")
+    parser.add_argument("--output", help="Write the JSON report to this file instead of stdout")
+    parser.add_argument("--baseline", help="Previous JSON report to compare against")
+    args = parser.parse_args()
+
+    # The tools log every call; keep that out of the JSON report
+    with tempfile.TemporaryDirectory() as workdir, open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        runs = [
+            run_size(size, backend, args.queries, args.top_k, args.concurrency, workdir)
+            for size in args.sizes
+            for backend in args.backends
+        ]
+    report = {
+        "embedder": embedding_function_from_env().embedder.name,
+        "top_k": args.top_k,
+        "runs": runs,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            compare(report, json.load(f))
+
+
+if __name__ == "__main__":
+    main_cli()
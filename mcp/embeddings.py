@@ -0,0 +1,154 @@
+import hashlib
+import math
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from typing import Protocol
+
+from chromadb import Documents, EmbeddingFunction, Embeddings
+
+from embedding_cache import EmbeddingCache
+
+DEFAULT_MODEL = "text-embedding-004"
+# batchEmbedContents accepts at most 100 texts per request
+DEFAULT_BATCH_SIZE = 100
+DEFAULT_MAX_CONCURRENCY = 4
+
+
+class Embedder(Protocol):
+    """Anything that turns one batch of texts into one vector per text."""
+
+    name: str
+
+    def embed(self, texts: list[str]) -> list[list[float]]: ...
+
+
+class GeminiEmbedder:
+    """Embeds a batch of texts with a single `embed_content` request."""
+
+    def __init__(self, client, model: str = DEFAULT_MODEL):
+        self.client = client
+        self.model = model
+        self.name = model
+
+    def embed(self, texts: list[str]) -> list[list[float]]:
+        response = self.client.models.embed_content(model=self.model, contents=texts)
+        return [embedding.values for embedding in response.embeddings]
+
+
+class LocalHashEmbedder:
+    """Deterministic offline embedder based on hashed word and bigram features.
+
+    Texts sharing vocabulary end up close to each other, which is enough to
+    benchmark and test retrieval without network access or API quota.
+    """
+
+    _token_pattern = re.compile(r"[a-z0-9]+")
+
+    def __init__(self, dimensions: int = 768):
+        self.dimensions = dimensions
+        self.name = f"local-hash-{dimensions}"
+
+    def _embed_one(self, text: str) -> list[float]:
+        vector = [0.0] * self.dimensions
+        tokens = self._token_pattern.findall(text.lower())
+        features = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+        for feature in features:
+            digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+            bucket = int.from_bytes(digest[:4], "little") % self.dimensions
+            sign = 1.0 if digest[4] & 1 else -1.0
+            vector[bucket] += sign
+        norm = math.sqrt(sum(value * value for value in vector))
+        if norm:
+            vector = [value / norm for value in vector]
+        return vector
+
+    def embed(self, texts: list[str]) -> list[list[float]]:
+        return [self._embed_one(text) for text in texts]
+
+
+class GeminiEmbeddingFunction(EmbeddingFunction):
+    """Chroma embedding function that batches documents and embeds batches concurrently.
+
+    Documents are split into batches of `batch_size`; up to `max_concurrency`
+    batches are in flight at once. Output order always matches input order.
+    When a `cache` is given, only documents missing from it are sent to the embedder.
+    """
+
+    def __init__(
+        self,
+        embedder: Embedder,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        cache: EmbeddingCache | None = None,
+    ):
+        if batch_size < 1:
+            raise ValueError("batch_size must be at least 1")
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+        self.embedder = embedder
+        self.batch_size = batch_size
+        self.max_concurrency = max_concurrency
+        self.cache = cache
+
+    def __call__(self, input: Documents) -> Embeddings:
+        documents = list(input)
+        if self.cache is None:
+            return self.embed_documents(documents)
+
+        embeddings = self.cache.get_many(self.embedder.name, documents)
+        missing = list(dict.fromkeys(
+            doc for doc, embedding in zip(documents, embeddings) if embedding is None
+        ))
+        if missing:
+            vectors = self.embed_documents(missing)
+            self.cache.put_many(self.embedder.name, missing, vectors)
+            computed = dict(zip(missing, vectors))
+            embeddings = [
+                embedding if embedding is not None else computed[doc]
+                for doc, embedding in zip(documents, embeddings)
+            ]
+        return embeddings
+
+    def embed_documents(self, documents: list[str]) -> list[list[float]]:
+        """Embeds documents through the embedder, bypassing the cache."""
+        if not documents:
+            return []
+        batches = [
+            documents[start:start + self.batch_size]
+            for start in range(0, len(documents), self.batch_size)
+        ]
+        if len(batches) == 1 or self.max_concurrency == 1:
+            results = [self.embedder.embed(batch) for batch in batches]
+        else:
+            workers = min(self.max_concurrency, len(batches))
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                # map() yields in submission order, so batches stay aligned with the input
+                results = list(pool.map(self.embedder.embed, batches))
+
+        embeddings = []
+        for batch, vectors in zip(batches, results):
+            if len(vectors) != len(batch):
+                raise RuntimeError(
+                    f"Embedder '{self.embedder.name}' returned {len(vectors)} vectors "
+                    f"for a batch of {len(batch)} documents"
+                )
+            embeddings.extend(vectors)
+        return embeddings
+
+
+def embedding_function_from_env(cache: EmbeddingCache | None = None) -> GeminiEmbeddingFunction:
+    """Builds the embedding function configured by the EMBEDDING_* environment variables."""
+    # EMBEDDING_BACKEND=local swaps Gemini for a deterministic offline embedder (benchmarks/tests)
+    if os.getenv("EMBEDDING_BACKEND", "gemini") == "local":
+        embedder = LocalHashEmbedder()
+    else:
+        from google import genai
+
+        embedder = GeminiEmbedder(genai.Client(), model=os.getenv("EMBEDDING_MODEL", DEFAULT_MODEL))
+    return GeminiEmbeddingFunction(
+        embedder,
+        batch_size=int(os.getenv("EMBEDDING_BATCH_SIZE", DEFAULT_BATCH_SIZE)),
+        max_concurrency=int(os.getenv("EMBEDDING_MAX_CONCURRENCY", DEFAULT_MAX_CONCURRENCY)),
+        cache=cache,
+    )
@@ -0,0 +1,229 @@
+"""Builds or refreshes the insurance_plan_details collection from a directory of policy documents.
+
+Only chunks whose content changed since the last run are embedded again:
+
+    uv run ingest.py --source policies/
+
+Supported inputs are `.txt`/`.md` files (one plan per file) and `.json`/`.jsonl`
+files holding plan records such as
+`{"name": ..., "description": ..., "plan_type": ..., "sum_insured": ...}`.
+The record text is taken from `document`, `text` or `description`; the other
+scalar fields are stored as metadata.
+"""
+import argparse
+import hashlib
+import json
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Iterator
+
+import chromadb
+from dotenv import load_dotenv
+
+from embeddings import GeminiEmbeddingFunction, embedding_function_from_env
+
+TEXT_EXTENSIONS = (".txt", ".md")
+RECORD_EXTENSIONS = (".json", ".jsonl")
+TEXT_FIELDS = ("document", "text", "description")
+
+
+@dataclass
+class Chunk:
+    id: str
+    text: str
+    metadata: dict
+
+
+@dataclass
+class IngestStats:
+    documents: int = 0
+    chunks: int = 0
+    skipped: int = 0
+    embedded: int = 0
+    deleted: int = 0
+    started_at: float = field(default_factory=time.perf_counter)
+
+    def report(self) -> str:
+        elapsed = time.perf_counter() - self.started_at
+        rate = self.chunks / elapsed if elapsed else 0.0
+        embed_rate = self.embedded / elapsed if elapsed else 0.0
+        return (
+            f"{self.documents} documents, {self.chunks} chunks: {self.embedded} embedded, "
+            f"{self.skipped} unchanged, {self.deleted} deleted in {elapsed:.1f}s "
+            f"({rate:.1f} chunks/s, {embed_rate:.1f} embeddings/s)"
+        )
+
+
+def chunk_text(text: str, chunk_size: int, overlap: int) -> list[str]:
+    """Splits text on paragraph boundaries into chunks of at most `chunk_size` characters."""
+    chunks, current = [], ""
+    for paragraph in (p.strip() for p in text.split("\n\n")):
+        if not paragraph:
+            continue
+        if current and len(current) + len(paragraph) + 2 > chunk_size:
+            chunks.append(current)
+            current = ""
+        while len(paragraph) > chunk_size:
+            chunks.append(paragraph[:chunk_size])
+            paragraph = paragraph[chunk_size - overlap:]
+        current = f"{current}\n\n{paragraph}" if current else paragraph
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def _scalar_metadata(record: dict) -> dict:
+    # Chroma metadata values must be scalars
+    return {
+        key: value for key, value in record.items()
+        if key not in TEXT_FIELDS and isinstance(value, (str, int, float, bool))
+    }
+
+
+def read_documents(source_dir: str) -> Iterator[tuple[str, str, dict]]:
+    """Yields (source id, text, metadata) for every document under `source_dir`, one at a time."""
+    for root, dirs, files in os.walk(source_dir):
+        dirs.sort()
+        for filename in sorted(files):
+            path = os.path.join(root, filename)
+            source = os.path.relpath(path, source_dir).replace(os.sep, "/")
+            extension = os.path.splitext(filename)[1].lower()
+            if extension in TEXT_EXTENSIONS:
+                with open(path, "r", encoding="utf-8") as f:
+                    text = f.read()
+                name = next((line.strip("# ").strip() for line in text.splitlines() if line.strip()), source)
+                yield source, text, {"name": name}
+            elif extension in RECORD_EXTENSIONS:
+                with open(path, "r", encoding="utf-8") as f:
+                    if extension == ".jsonl":
+                        records = [json.loads(line) for line in f if line.strip()]
+                    else:
+                        records = json.load(f)
+                if isinstance(records, dict):
+                    records = [records]
+                for index, record in enumerate(records):
+                    text = next((record[key] for key in TEXT_FIELDS if record.get(key)), None)
+                    if text is None:
+                        print(f"Skipping record {index} in {source}: no {'/'.join(TEXT_FIELDS)} field")
+                        continue
+                    record_id = record.get("id", record.get("name", index))
+                    yield f"{source}:{record_id}", text, _scalar_metadata(record)
+
+
+def iter_chunks(
+    source_dir: str, chunk_size: int, overlap: int, model: str, stats: IngestStats
+) -> Iterator[tuple[str, list[Chunk]]]:
+    """Yields each document's source id together with its chunks."""
+    for source, text, metadata in read_documents(source_dir):
+        stats.documents += 1
+        chunks = []
+        for index, chunk in enumerate(chunk_text(text, chunk_size, overlap)):
+            # The model name is part of the hash so switching models re-embeds everything
+            content_hash = hashlib.sha256(f"{model}\0{chunk}".encode("utf-8")).hexdigest()
+            chunks.append(Chunk(
+                id=f"{source}#{index}",
+                text=chunk,
+                metadata={**metadata, "source": source, "chunk_index": index, "content_hash": content_hash},
+            ))
+        yield source, chunks
+
+
+def upsert_changed(collection, embedding_function: GeminiEmbeddingFunction, chunks: list[Chunk], stats: IngestStats) -> None:
+    """Embeds and upserts the chunks whose content hash differs from the stored one."""
+    if not chunks:
+        return
+    stats.chunks += len(chunks)
+    existing = collection.get(ids=[chunk.id for chunk in chunks], include=["metadatas"])
+    stored_hashes = {
+        chunk_id: (metadata or {}).get("content_hash")
+        for chunk_id, metadata in zip(existing["ids"], existing["metadatas"])
+    }
+    changed = [chunk for chunk in chunks if stored_hashes.get(chunk.id) != chunk.metadata["content_hash"]]
+    stats.skipped += len(chunks) - len(changed)
+    if not changed:
+        return
+    embeddings = embedding_function.embed_documents([chunk.text for chunk in changed])
+    collection.upsert(
+        ids=[chunk.id for chunk in changed],
+        documents=[chunk.text for chunk in changed],
+        embeddings=embeddings,
+        metadatas=[chunk.metadata for chunk in changed],
+    )
+    stats.embedded += len(changed)
+
+
+def ingest(
+    source_dir: str,
+    db_path: str = "insurance_db",
+    collection_name: str = "insurance_plan_details",
+    chunk_size: int = 1500,
+    overlap: int = 200,
+    prune: bool = False,
+    embedding_function: GeminiEmbeddingFunction | None = None,
+) -> IngestStats:
+    if not 0 <= overlap < chunk_size:
+        raise ValueError("overlap must be smaller than chunk_size")
+    embedding_function = embedding_function or embedding_function_from_env()
+    chroma_client = chromadb.PersistentClient(path=db_path)
+    collection = chroma_client.get_or_create_collection(
+        name=collection_name, embedding_function=embedding_function
+    )
+    stats = IngestStats()
+    # Enough chunks per round trip to keep every embedding worker busy
+    window_size = embedding_function.batch_size * embedding_function.max_concurrency
+
+    window: list[Chunk] = []
+    seen_sources = set()
+    for source, chunks in iter_chunks(source_dir, chunk_size, overlap, embedding_function.embedder.name, stats):
+        seen_sources.add(source)
+        # Drop chunks left over from a longer previous version of this document
+        stale = collection.get(
+            where={"$and": [{"source": source}, {"chunk_index": {"$gte": len(chunks)}}]}, include=[]
+        )["ids"]
+        if stale:
+            collection.delete(ids=stale)
+            stats.deleted += len(stale)
+        window.extend(chunks)
+        if len(window) >= window_size:
+            upsert_changed(collection, embedding_function, window, stats)
+            window = []
+    upsert_changed(collection, embedding_function, window, stats)
+
+    if prune:
+        # Remove chunks of documents that no longer exist in the source directory
+        ingested = collection.get(where={"chunk_index": {"$gte": 0}}, include=["metadatas"])
+        orphans = [
+            chunk_id for chunk_id, metadata in zip(ingested["ids"], ingested["metadatas"])
+            if metadata.get("source") not in seen_sources
+        ]
+        if orphans:
+            collection.delete(ids=orphans)
+            stats.deleted += len(orphans)
+    return stats
+
+
+def main():
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Incrementally ingest policy documents into ChromaDB.")
+    parser.add_argument("--source", required=True, help="Directory containing policy documents")
+    parser.add_argument("--db", default="insurance_db", help="Chroma persistent directory")
+    parser.add_argument("--collection", default="insurance_plan_details")
+    parser.add_argument("--chunk-size", type=int, default=1500, help="Maximum characters per chunk")
+    parser.add_argument("--chunk-overlap", type=int, default=200)
+    parser.add_argument("--prune", action="store_true", help="Delete chunks of documents missing from --source")
+    args = parser.parse_args()
+
+    stats = ingest(
+        args.source,
+        db_path=args.db,
+        collection_name=args.collection,
+        chunk_size=args.chunk_size,
+        overlap=args.chunk_overlap,
+        prune=args.prune,
+    )
+    print(f"Ingestion finished: {stats.report()}")
+
+
+if __name__ == "__main__":
+    main()
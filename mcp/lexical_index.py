@@ -0,0 +1,116 @@
+import math
+import re
+from collections import Counter, defaultdict
+
+_token_pattern = re.compile(r"[a-z0-9]+")
+_stop_words = frozenset(
+    "a an and are as at be by for from has have in is it of on or that the to with".split()
+)
+
+
+def tokenize(text: str) -> list[str]:
+    return [token for token in _token_pattern.findall(text.lower()) if token not in _stop_words]
+
+
+def matches_where(metadata: dict | None, where: dict | None) -> bool:
+    """Evaluates the subset of Chroma `where` syntax used by the policy finder against a metadata dict."""
+    if not where:
+        return True
+    metadata = metadata or {}
+    for key, condition in where.items():
+        if key == "$and":
+            if not all(matches_where(metadata, clause) for clause in condition):
+                return False
+            continue
+        if key == "$or":
+            if not any(matches_where(metadata, clause) for clause in condition):
+                return False
+            continue
+        if not isinstance(condition, dict):
+            condition = {"$eq": condition}
+        value = metadata.get(key)
+        for operator, expected in condition.items():
+            if operator == "$ne":
+                if value == expected:
+                    return False
+                continue
+            if value is None:
+                return False
+            if operator == "$eq" and value != expected:
+                return False
+            if operator == "$in" and value not in expected:
+                return False
+            if operator == "$nin" and value in expected:
+                return False
+            try:
+                if operator == "$gt" and not value > expected:
+                    return False
+                if operator == "$gte" and not value >= expected:
+                    return False
+                if operator == "$lt" and not value < expected:
+                    return False
+                if operator == "$lte" and not value <= expected:
+                    return False
+            except TypeError:
+                return False
+    return True
+
+
+class BM25Index:
+    """In-memory BM25 inverted index over the documents of a Chroma collection."""
+
+    def __init__(self, ids: list[str], documents: list[str], metadatas: list[dict | None], k1: float = 1.5, b: float = 0.75):
+        self.ids = list(ids)
+        self.documents = list(documents)
+        self.metadatas = [metadata or {} for metadata in metadatas]
+        self.positions = {item_id: position for position, item_id in enumerate(self.ids)}
+        # Metadata keys recorded by at least one document
+        self.metadata_keys = frozenset(key for metadata in self.metadatas for key in metadata)
+        self.k1 = k1
+        self.b = b
+        self._postings: dict[str, list[tuple[int, int]]] = defaultdict(list)
+        self._lengths = []
+        for position, document in enumerate(self.documents):
+            terms = Counter(tokenize(document or ""))
+            self._lengths.append(sum(terms.values()))
+            for term, frequency in terms.items():
+                self._postings[term].append((position, frequency))
+        self._average_length = (sum(self._lengths) / len(self._lengths)) if self._lengths else 0.0
+
+    @classmethod
+    def from_collection(cls, collection) -> "BM25Index":
+        records = collection.get(include=["documents", "metadatas"])
+        return cls(records["ids"], records["documents"], records["metadatas"])
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def search(self, query: str, top_k: int, where: dict | None = None) -> list[tuple[str, float]]:
+        """Returns up to `top_k` (id, score) pairs, best first, for documents matching `where`."""
+        scores: dict[int, float] = defaultdict(float)
+        total = len(self.ids)
+        for term in set(tokenize(query)):
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (total - len(postings) + 0.5) / (len(postings) + 0.5))
+            for position, frequency in postings:
+                length_norm = 1 - self.b + self.b * self._lengths[position] / (self._average_length or 1)
+                scores[position] += idf * frequency * (self.k1 + 1) / (frequency + self.k1 * length_norm)
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+        results = []
+        for position, score in ranked:
+            if matches_where(self.metadatas[position], where):
+                results.append((self.ids[position], score))
+                if len(results) == top_k:
+                    break
+        return results
+
+
+def reciprocal_rank_fusion(rankings: list[list[str]], k: int = 60) -> list[tuple[str, float]]:
+    """Fuses several ranked id lists into one, scoring each id by the sum of 1 / (k + rank)."""
+    scores: dict[str, float] = defaultdict(float)
+    for ranking in rankings:
+        for rank, item_id in enumerate(ranking, start=1):
+            scores[item_id] += 1.0 / (k + rank)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
@@ -1,48 +1,295 @@
+import os
+import threading
+import time
+
 from fastmcp import FastMCP
-from chromadb import Documents, EmbeddingFunction, Embeddings
 import chromadb
-from google import genai
 from dotenv import load_dotenv
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+
+from embedding_cache import DiskEmbeddingStore, EmbeddingCache
+from embeddings import embedding_function_from_env
+from result_cache import SemanticResultCache, ThrottledFingerprint, collection_fingerprint
+from payload import to_plan_records
+from retrieval import PolicyRetriever, build_where
+from worker_pool import BoundedWorkerPool
 
 # Initialize MCP server
 mcp = FastMCP("policy-finder")
 
-# Initialize embedding model and chromadb
 load_dotenv()
-embedding_client = genai.Client()
+INSURANCE_DB_PATH = os.getenv("INSURANCE_DB_PATH", "insurance_db")
+COLLECTION_NAME = "insurance_plan_details"
+WARMUP_QUERY = "health insurance plan with hospitalization cover"
+WARMUP_ON_START = os.getenv("WARMUP_ON_START", "true").lower() != "false"
+# A failed warmup is retried after this many seconds, doubling up to the maximum
+WARMUP_RETRY_SECONDS = float(os.getenv("WARMUP_RETRY_SECONDS", 2))
+WARMUP_MAX_RETRY_SECONDS = float(os.getenv("WARMUP_MAX_RETRY_SECONDS", 60))
+
+# The embedding client, Chroma client and indexes are created on first use (or by warmup)
+# so that a missing DB or slow credential loading never blocks server startup.
+_retriever: PolicyRetriever | None = None
+_init_lock = threading.Lock()
+_ready = threading.Event()
+_warmup_status = {"state": "pending", "error": None, "seconds": None, "attempts": 0}
+
+# Embedding I/O and Chroma search run here, keeping the event loop free for other sessions
+search_pool = BoundedWorkerPool(max_workers=int(os.getenv("SEARCH_MAX_WORKERS", 8)))
+
+
+def insurance_db_fingerprint():
+    return collection_fingerprint(INSURANCE_DB_PATH)
+
+
+def get_retriever() -> PolicyRetriever:
+    """Initializes the embedding model, chromadb and the caches on first call."""
+    global _retriever
+    if _retriever is not None:
+        return _retriever
+    with _init_lock:
+        if _retriever is None:
+            # Every cache and index checks insurance_db for changes through one throttled fingerprint,
+            # so searches do not each walk the directory
+            db_version = ThrottledFingerprint(
+                insurance_db_fingerprint,
+                float(os.getenv("DB_FINGERPRINT_INTERVAL_SECONDS", 5)),
+            )
+
+            # Query embeddings are cached in memory and, unless disabled, in a SQLite file next to insurance_db
+            embedding_cache_path = os.getenv("EMBEDDING_CACHE_PATH", "embedding_cache.sqlite3")
+            embedding_cache = EmbeddingCache(
+                max_entries=int(os.getenv("EMBEDDING_CACHE_SIZE", 4096)),
+                disk_store=DiskEmbeddingStore(embedding_cache_path) if embedding_cache_path else None,
+            )
+            embedding_function = embedding_function_from_env(cache=embedding_cache)
+
+            chroma_client = chromadb.PersistentClient(path=INSURANCE_DB_PATH)
+            insurance_collection = chroma_client.get_collection(name=COLLECTION_NAME, embedding_function=embedding_function)
+
+            # Whole query results are reused for semantically equivalent queries until insurance_db changes
+            result_cache = SemanticResultCache(
+                max_entries=int(os.getenv("RESULT_CACHE_SIZE", 256)),
+                ttl_seconds=float(os.getenv("RESULT_CACHE_TTL_SECONDS", 3600)),
+                max_distance=float(os.getenv("RESULT_CACHE_MAX_DISTANCE", 0.02)),
+                fingerprint=db_version,
+                # db_version is throttled already
+                fingerprint_interval_seconds=0,
+            )
+
+            # VECTOR_BACKEND=numpy serves dense search from a memory-mapped NumPy copy of the collection
+            search_collection = insurance_collection
+            if os.getenv("VECTOR_BACKEND", "chroma") == "numpy":
+                from vector_index import NumpyCollection
+
+                search_collection = NumpyCollection(
+                    insurance_collection,
+                    os.getenv("NUMPY_INDEX_PATH", f"{INSURANCE_DB_PATH}_numpy"),
+                    db_version,
+                    quantize=os.getenv("NUMPY_INDEX_QUANTIZE", "true").lower() != "false",
+                )
+
+            _retriever = PolicyRetriever(
+                search_collection,
+                embedding_function,
+                result_cache=result_cache,
+                fingerprint=db_version,
+            )
+            # A request that could build the retriever can be served, warmup or not
+            _ready.set()
+    return _retriever
+
+
+def use_retriever(retriever: PolicyRetriever) -> None:
+    """Replaces the lazily built retriever, e.g. with one over a benchmark corpus."""
+    global _retriever
+    with _init_lock:
+        _retriever = retriever
+
+
+def warmup() -> bool:
+    """Initializes all clients, loads the HNSW and BM25 indexes and runs a dummy query."""
+    started_at = time.perf_counter()
+    _warmup_status["state"] = "running"
+    _warmup_status["attempts"] += 1
+    try:
+        retriever = get_retriever()
+        retriever.collection.count()
+        retriever.lexical_index()
+        # A real search pulls the HNSW index into memory and primes the embedding client
+        retriever.search(WARMUP_QUERY, top_k=1)
+    except Exception as e:
+        _warmup_status.update(state="failed", error=str(e))
+        print(f"\n--- Warmup failed: {e} ---")
+        return False
+    _warmup_status.update(state="done", error=None, seconds=round(time.perf_counter() - started_at, 3))
+    _ready.set()
+    print(f"\n--- Warmup finished in {_warmup_status['seconds']}s ---")
+    return True
+
+
+def warmup_until_done() -> None:
+    """Runs warmup until it succeeds, backing off exponentially between failed attempts.
+
+    A database that is still being mounted or a credential that is not yet
+    available at boot therefore does not leave the instance unready for good.
+    """
+    delay = WARMUP_RETRY_SECONDS
+    while not warmup():
+        print(f"--- Retrying warmup in {delay}s ---")
+        time.sleep(delay)
+        delay = min(delay * 2, WARMUP_MAX_RETRY_SECONDS)
+
 
-class GeminiEmbeddingFunction(EmbeddingFunction):
-    def __call__(self, input: Documents) -> Embeddings:
-        embeddings = []
-        for doc in input:
-            embedding = embedding_client.models.embed_content(model="text-embedding-004", contents=doc)
-            embeddings.append(embedding.embeddings[0].values)
-        return embeddings
+def start_warmup() -> None:
+    """Warms up in the background, or marks the server ready at once when warmup is disabled."""
+    if WARMUP_ON_START:
+        threading.Thread(target=warmup_until_done, name="warmup", daemon=True).start()
+    else:
+        # Everything is initialized by the first request instead
+        _warmup_status["state"] = "skipped"
+        _ready.set()
 
-chroma_client = chromadb.PersistentClient(path="insurance_db")
-insurance_collection = chroma_client.get_collection(name="insurance_plan_details", embedding_function=GeminiEmbeddingFunction())
+
+def _with_note(query_results: dict, dropped: list[str]) -> dict:
+    if dropped:
+        query_results["note"] = (
+            f"Ignored filters: {', '.join(dropped)}. The plan database does not record them; "
+            "check these requirements against the plan text instead."
+        )
+    return query_results
+
+
+@mcp.custom_route("/health", methods=["GET"])
+async def health(request: Request) -> JSONResponse:
+    """Liveness probe: the process is up and serving HTTP."""
+    return JSONResponse({"status": "ok"})
+
+
+@mcp.custom_route("/ready", methods=["GET"])
+async def ready(request: Request) -> JSONResponse:
+    """Readiness probe: succeeds once warmup or a request has initialized the retriever, or warmup is off."""
+    status_code = 200 if _ready.is_set() else 503
+    return JSONResponse({"ready": _ready.is_set(), "warmup": _warmup_status}, status_code=status_code)
+
+
+@mcp.custom_route("/metrics", methods=["GET"])
+async def metrics(request: Request) -> JSONResponse:
+    """Worker pool queue depth and cache counters."""
+    body = {"search_pool": search_pool.stats()}
+    if _retriever is not None:
+        body["embedding_cache"] = _retriever.embedding_function.cache.stats()
+        body["result_cache"] = _retriever.result_cache.stats()
+        if hasattr(_retriever.collection, "stats"):
+            body["vector_index"] = _retriever.collection.stats()
+    return JSONResponse(body)
 
 # Initialize MCP tool
 @mcp.tool
-def get_insurance_plan(query: str) -> dict:
+async def get_insurance_plan(
+    query: str,
+    top_k: int = 2,
+    plan_type: str | None = None,
+    min_sum_insured: float | None = None,
+    max_waiting_period_months: int | None = None,
+    fields: list[str] | None = None,
+    max_chars: int = 500,
+    max_distance: float | None = None,
+) -> dict:
     """Retrieves relevant insurance plan information based on a user's query.
 
-    This tool queries a vector database of insurance documents to find the most
-    relevant plan details. Use the user's requirements and their medical profile
-    to form a comprehensive query.
+    This tool searches insurance documents both by meaning and by exact terms
+    (e.g. "maternity", "OPD", disease names) to find the most relevant plan
+    details. Use the user's requirements and their medical profile to form a
+    comprehensive query.
 
     Args:
         query (str): A natural language question or search term about
                      insurance plans (e.g., "Maternity coverage for low-risk profile", "dental plan for family with diabetes history").
+        top_k (int): Number of plans to return, at least 1.
+        plan_type (str, optional): Only return plans of this type (e.g. "individual", "family floater").
+        min_sum_insured (float, optional): Only return plans with at least this sum insured.
+        max_waiting_period_months (int, optional): Only return plans whose waiting period is at most this many months.
+                     Filters on information the plan database does not record are ignored.
+        fields (list[str], optional): Plan fields to return, out of "id", "name", "document",
+                     "metadata", "distance", "score" and "matched_queries". Defaults to
+                     name, document, metadata and distance.
+        max_chars (int): Maximum characters of plan text per plan; the passage best matching
+                     the query is kept. Use 0 for the full text.
+        max_distance (float, optional): Drop plans whose vector distance to the query is larger.
 
     Returns:
-        dict: A dictionary containing the query result with a list of plans.
+        dict: A dictionary with a ranked `plans` list, one record per plan, and a `note`
+              when a filter was ignored.
     """
     print(f"\n--- Tool: get_insurance_plan called with query: '{query}' ---")
-    query_results = insurance_collection.query(query_texts=[query], n_results=2)
+    where = build_where(plan_type, min_sum_insured, max_waiting_period_months)
+
+    def search():
+        retriever = get_retriever()
+        # Filters on metadata the collection does not record would exclude every plan
+        applicable, dropped = retriever.applicable_where(where)
+        return retriever.search(query, top_k=top_k, where=applicable), dropped
+
+    hits, dropped = await search_pool.run(search)
+    query_results = _with_note({"plans": to_plan_records(hits, query, fields, max_chars, max_distance)}, dropped)
+    print("\n--- CHROMADB QUERY RESULTS:", query_results)
+    print("--- SEARCH POOL:", search_pool.stats())
+    return query_results
+
+@mcp.tool
+async def get_insurance_plans(
+    queries: list[str],
+    top_k: int = 3,
+    plan_type: str | None = None,
+    min_sum_insured: float | None = None,
+    max_waiting_period_months: int | None = None,
+    fields: list[str] | None = None,
+    max_chars: int = 500,
+    max_distance: float | None = None,
+) -> dict:
+    """Retrieves insurance plans for several queries at once and merges them into one ranked list.
+
+    Prefer this tool over calling get_insurance_plan repeatedly when looking at a
+    profile from several angles (e.g. chronic-condition cover, family floater and
+    maternity). Plans found by more than one query are listed once and ranked higher.
+
+    Args:
+        queries (list[str]): Natural language questions or search terms about insurance plans.
+        top_k (int): Number of plans to return in the merged list, at least 1.
+        plan_type (str, optional): Only return plans of this type (e.g. "individual", "family floater").
+        min_sum_insured (float, optional): Only return plans with at least this sum insured.
+        max_waiting_period_months (int, optional): Only return plans whose waiting period is at most this many months.
+                     Filters on information the plan database does not record are ignored.
+        fields (list[str], optional): Plan fields to return, out of "id", "name", "document",
+                     "metadata", "distance", "score" and "matched_queries". Defaults to
+                     name, document, metadata and distance.
+        max_chars (int): Maximum characters of plan text per plan; the passage best matching
+                     the query is kept. Use 0 for the full text.
+        max_distance (float, optional): Drop plans whose vector distance to the query is larger.
+
+    Returns:
+        dict: A dictionary with the merged, ranked `plans` list; the `matched_queries`
+              field lists, for each plan, the indices of the queries that found it. A `note`
+              is added when a filter was ignored.
+    """
+    print(f"\n--- Tool: get_insurance_plans called with queries: {queries} ---")
+    where = build_where(plan_type, min_sum_insured, max_waiting_period_months)
+
+    def search():
+        retriever = get_retriever()
+        applicable, dropped = retriever.applicable_where(where)
+        return retriever.search_many(queries, top_k=top_k, where=applicable), dropped
+
+    hits, dropped = await search_pool.run(search)
+    query_results = _with_note(
+        {"plans": to_plan_records(hits, " ".join(queries), fields, max_chars, max_distance)}, dropped
+    )
     print("\n--- CHROMADB QUERY RESULTS:", query_results)
     return query_results
 
 # Start the server using streamable http transport
 if __name__ == "__main__":
+    # Warm up in the background; /ready reports 503 until the retriever is usable
+    start_warmup()
     mcp.run(transport="streamable-http",host="0.0.0.0", port=15001)
\ No newline at end of file
@@ -0,0 +1,77 @@
+import re
+
+from lexical_index import tokenize
+
+PLAN_FIELDS = ("id", "name", "document", "metadata", "distance", "score", "matched_queries")
+DEFAULT_FIELDS = ("name", "document", "metadata", "distance")
+# Bookkeeping written by the ingestion CLI that is of no use to the agent
+INTERNAL_METADATA = ("content_hash", "chunk_index", "source")
+
+
+def extract_snippet(document: str, query: str, max_chars: int) -> str:
+    """Returns the `max_chars` window of the document holding the most query-term matches."""
+    if max_chars <= 0 or len(document) <= max_chars:
+        return document
+    terms = set(tokenize(query))
+    positions = []
+    if terms:
+        pattern = re.compile(r"\b(?:" + "|".join(map(re.escape, sorted(terms))) + r")\b", re.IGNORECASE)
+        positions = [match.start() for match in pattern.finditer(document)]
+
+    start = 0
+    if positions:
+        # Slide a window over the match positions and keep the densest one
+        best_count, right = 0, 0
+        for left, position in enumerate(positions):
+            while right < len(positions) and positions[right] < position + max_chars:
+                right += 1
+            if right - left > best_count:
+                best_count, start = right - left, position
+        # Give the first match some leading context and snap to a word boundary
+        start = max(0, min(start - max_chars // 5, len(document) - max_chars))
+        if start:
+            space = document.find(" ", start)
+            start = space + 1 if 0 <= space < start + 30 else start
+
+    end = min(len(document), start + max_chars)
+    if end < len(document):
+        space = document.rfind(" ", start, end)
+        end = space if space > start + max_chars // 2 else end
+    snippet = document[start:end].strip()
+    return f"{'…' if start else ''}{snippet}{'…' if end < len(document) else ''}"
+
+
+def to_plan_records(
+    hits: list[dict],
+    query: str,
+    fields: list[str] | None = None,
+    max_chars: int = 500,
+    max_distance: float | None = None,
+) -> list[dict]:
+    """Projects retrieval hits into compact plan records, keeping their ranking.
+
+    Only the requested `fields` are included, documents are cut down to the
+    snippet around the matched passage, and hits farther than `max_distance`
+    from the query are dropped.
+    """
+    fields = [field for field in (fields or DEFAULT_FIELDS) if field in PLAN_FIELDS]
+    records = []
+    for rank, hit in enumerate(hits, start=1):
+        if max_distance is not None and hit["distance"] is not None and hit["distance"] > max_distance:
+            continue
+        metadata = {key: value for key, value in hit["metadata"].items() if key not in INTERNAL_METADATA}
+        if metadata.get("description") == hit["document"]:
+            del metadata["description"]
+        values = {
+            "id": hit["id"],
+            "name": metadata.pop("name", None) or hit["id"],
+            "document": extract_snippet(hit["document"] or "", query, max_chars),
+            "metadata": metadata,
+            "distance": round(float(hit["distance"]), 4) if hit["distance"] is not None else None,
+            "score": round(float(hit["score"]), 5),
+            "matched_queries": hit.get("matched_queries"),
+        }
+        record = {"rank": rank}
+        record.update({field: values[field] for field in fields})
+        records.append(record)
+    return records
@@ -0,0 +1,180 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Hashable
+
+import numpy as np
+
+
+def collection_fingerprint(db_path: str) -> tuple:
+    """Cheap fingerprint of a Chroma persistent directory that changes whenever it is written to.
+
+    Chroma writes every add/upsert/delete to its SQLite file and HNSW segment
+    files, so the newest modification time across them works as a version stamp,
+    including for writes made by other processes such as the ingestion CLI.
+    """
+    newest = 0
+    files = 0
+    try:
+        with os.scandir(db_path) as entries:
+            for entry in entries:
+                if entry.is_dir():
+                    with os.scandir(entry.path) as segment_files:
+                        for segment_file in segment_files:
+                            newest = max(newest, segment_file.stat().st_mtime_ns)
+                            files += 1
+                elif not entry.name.endswith("-shm"):
+                    # SQLite's shared-memory index is touched by readers too
+                    newest = max(newest, entry.stat().st_mtime_ns)
+                    files += 1
+    except FileNotFoundError:
+        pass
+    return files, newest
+
+
+class ThrottledFingerprint:
+    """Wraps a fingerprint function so the underlying check runs at most every `interval_seconds`.
+
+    In between, the last fingerprint is returned, so a change is noticed up to
+    `interval_seconds` late. One instance can be shared by every component that
+    watches the same collection.
+    """
+
+    def __init__(self, fingerprint: Callable[[], Hashable], interval_seconds: float = 5.0):
+        self.fingerprint = fingerprint
+        self.interval_seconds = interval_seconds
+        self._version = fingerprint()
+        self._checked_at = time.monotonic()
+
+    def __call__(self) -> Hashable:
+        now = time.monotonic()
+        if now - self._checked_at >= self.interval_seconds:
+            self._checked_at = now
+            self._version = self.fingerprint()
+        return self._version
+
+
+def _normalized(vector) -> np.ndarray:
+    vector = np.asarray(vector, dtype=np.float32).ravel()
+    norm = float(np.linalg.norm(vector))
+    return vector / norm if norm else vector
+
+
+@dataclass
+class _Entry:
+    # Row of the entry's embedding in the cache's vector matrix
+    row: int
+    params: Hashable
+    result: Any
+    created_at: float
+
+
+class SemanticResultCache:
+    """Caches query results and serves them to any later query with a close enough embedding.
+
+    A lookup hits when a cached entry with the same query parameters lies within
+    `max_distance` cosine distance of the new query embedding. Entries expire after
+    `ttl_seconds`, the least recently used entry is evicted beyond `max_entries`,
+    and everything is dropped when `fingerprint()` reports that the collection changed.
+    The fingerprint is checked at most every `fingerprint_interval_seconds`.
+
+    Normalized embeddings are kept as rows of one matrix, so a lookup is a single
+    matrix-vector product over all entries.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 256,
+        ttl_seconds: float = 3600,
+        max_distance: float = 0.02,
+        fingerprint: Callable[[], Hashable] | None = None,
+        fingerprint_interval_seconds: float = 5.0,
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_distance = max_distance
+        self.fingerprint = fingerprint
+        self._fingerprint = ThrottledFingerprint(fingerprint, fingerprint_interval_seconds) if fingerprint else None
+        self._entries: OrderedDict[int, _Entry] = OrderedDict()
+        self._next_id = 0
+        # Allocated on the first put, once the embedding size is known
+        self._vectors: np.ndarray | None = None
+        self._free_rows: list[int] = []
+        self._version = self._fingerprint() if fingerprint else None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._free_rows = list(range(self.max_entries)) if self._vectors is not None else []
+            self.invalidations += 1
+
+    def _check_version(self) -> None:
+        if self._fingerprint is None:
+            return
+        version = self._fingerprint()
+        if version != self._version:
+            self._version = version
+            self.invalidate()
+
+    def _remove(self, key: int) -> None:
+        self._free_rows.append(self._entries.pop(key).row)
+
+    def get(self, vector, params: Hashable = None) -> Any | None:
+        if self.max_entries <= 0:
+            return None
+        self._check_version()
+        query = _normalized(vector)
+        with self._lock:
+            if self._vectors is None or query.shape[0] != self._vectors.shape[1]:
+                self.misses += 1
+                return None
+            now = time.monotonic()
+            keys, rows = [], []
+            for key, entry in list(self._entries.items()):
+                if now - entry.created_at > self.ttl_seconds:
+                    self._remove(key)
+                elif entry.params == params:
+                    keys.append(key)
+                    rows.append(entry.row)
+            if keys:
+                distances = 1.0 - (self._vectors @ query)[rows]
+                best = int(np.argmin(distances))
+                if distances[best] <= self.max_distance:
+                    best_key = keys[best]
+                    self._entries.move_to_end(best_key)
+                    self.hits += 1
+                    return self._entries[best_key].result
+            self.misses += 1
+            return None
+
+    def put(self, vector, result: Any, params: Hashable = None) -> None:
+        if self.max_entries <= 0:
+            return
+        vector = _normalized(vector)
+        with self._lock:
+            if self._vectors is None or vector.shape[0] != self._vectors.shape[1]:
+                # First entry, or the embedding model changed: start a new matrix
+                self._vectors = np.zeros((self.max_entries, vector.shape[0]), dtype=np.float32)
+                self._entries.clear()
+                self._free_rows = list(range(self.max_entries))
+            if not self._free_rows:
+                self._remove(next(iter(self._entries)))
+            row = self._free_rows.pop()
+            self._vectors[row] = vector
+            self._entries[self._next_id] = _Entry(row, params, result, time.monotonic())
+            self._next_id += 1
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+        }
@@ -0,0 +1,188 @@
+import itertools
+import json
+import threading
+from typing import Callable, Hashable
+
+from embeddings import GeminiEmbeddingFunction
+from lexical_index import BM25Index, reciprocal_rank_fusion
+from result_cache import SemanticResultCache
+
+# Each retriever contributes this many candidates per requested result to the fusion
+CANDIDATES_PER_RESULT = 4
+MIN_CANDIDATES = 20
+
+# Metadata key each filter argument of `build_where` matches
+FILTER_ARGUMENTS = {
+    "plan_type": "plan_type",
+    "sum_insured": "min_sum_insured",
+    "waiting_period_months": "max_waiting_period_months",
+}
+
+
+def build_where(
+    plan_type: str | None = None,
+    min_sum_insured: float | None = None,
+    max_waiting_period_months: int | None = None,
+) -> dict | None:
+    """Builds a Chroma `where` clause from the structured plan filters."""
+    clauses = []
+    if plan_type:
+        clauses.append({"plan_type": plan_type})
+    if min_sum_insured is not None:
+        clauses.append({"sum_insured": {"$gte": min_sum_insured}})
+    if max_waiting_period_months is not None:
+        clauses.append({"waiting_period_months": {"$lte": max_waiting_period_months}})
+    if not clauses:
+        return None
+    return clauses[0] if len(clauses) == 1 else {"$and": clauses}
+
+
+def drop_unknown_filters(where: dict | None, metadata_keys: frozenset) -> tuple[dict | None, list[str]]:
+    """Removes the clauses of a `build_where` clause on metadata no document records.
+
+    Such a filter would exclude every plan, e.g. `plan_type` on a collection
+    ingested without that field. Returns the remaining clause and the filter
+    arguments that were dropped.
+    """
+    if not where:
+        return where, []
+    clauses = where["$and"] if "$and" in where else [where]
+    kept = []
+    dropped = []
+    for clause in clauses:
+        (key,) = clause
+        if key in metadata_keys:
+            kept.append(clause)
+        else:
+            dropped.append(FILTER_ARGUMENTS.get(key, key))
+    if not kept:
+        return None, dropped
+    return (kept[0] if len(kept) == 1 else {"$and": kept}), dropped
+
+
+def _check_top_k(top_k: int) -> None:
+    if top_k < 1:
+        raise ValueError("top_k must be at least 1")
+
+
+class PolicyRetriever:
+    """Hybrid dense + BM25 retrieval over the policy collection, fused with reciprocal rank fusion.
+
+    Metadata filters are pushed down to Chroma as `where` clauses and applied to
+    the lexical candidates as well, so both retrievers only score eligible plans.
+    Use `applicable_where` first to drop filters the collection has no metadata for.
+    """
+
+    def __init__(
+        self,
+        collection,
+        embedding_function: GeminiEmbeddingFunction,
+        result_cache: SemanticResultCache | None = None,
+        fingerprint: Callable[[], Hashable] | None = None,
+    ):
+        self.collection = collection
+        self.embedding_function = embedding_function
+        self.result_cache = result_cache
+        self.fingerprint = fingerprint
+        self._lexical_index: BM25Index | None = None
+        self._lexical_version = None
+        self._lock = threading.Lock()
+
+    def lexical_index(self) -> BM25Index:
+        """Returns the BM25 index, rebuilding it from the collection whenever the collection changed.
+
+        Called on every search, so `fingerprint` should be a ThrottledFingerprint.
+        """
+        version = self.fingerprint() if self.fingerprint else None
+        with self._lock:
+            if self._lexical_index is None or version != self._lexical_version:
+                self._lexical_index = BM25Index.from_collection(self.collection)
+                self._lexical_version = version
+            return self._lexical_index
+
+    def applicable_where(self, where: dict | None) -> tuple[dict | None, list[str]]:
+        """Returns `where` without the filters no plan in the collection has metadata for, and those filters."""
+        return drop_unknown_filters(where, self.lexical_index().metadata_keys)
+
+    def search(self, query: str, top_k: int = 2, where: dict | None = None) -> list[dict]:
+        """Returns the `top_k` best plans for the query as hit dicts, best first."""
+        _check_top_k(top_k)
+        query_embedding = self.embedding_function([query])[0]
+        params = (top_k, json.dumps(where, sort_keys=True))
+        if self.result_cache is not None:
+            cached = self.result_cache.get(query_embedding, params=params)
+            if cached is not None:
+                return cached
+
+        hits = self._search_embedded([query], [query_embedding], top_k, where)
+        if self.result_cache is not None:
+            self.result_cache.put(query_embedding, hits, params=params)
+        return hits
+
+    def search_many(self, queries: list[str], top_k: int = 3, where: dict | None = None) -> list[dict]:
+        """Searches several queries at once and returns one merged, deduplicated ranking.
+
+        All queries are embedded in a single batch and sent to Chroma as one
+        multi-embedding query. Plans are deduplicated by their `source` document,
+        so a plan split into several chunks appears once. Each hit lists the indices of the queries that rank it
+        among their own `top_k` best plans.
+        """
+        _check_top_k(top_k)
+        queries = [query for query in queries if query and query.strip()]
+        if not queries:
+            return []
+        query_embeddings = self.embedding_function(queries)
+        return self._search_embedded(queries, query_embeddings, top_k, where)
+
+    def _search_embedded(self, queries: list[str], query_embeddings, top_k: int, where: dict | None) -> list[dict]:
+        lexical_index = self.lexical_index()
+
+        def best_chunks(fused: list[tuple[str, float]]):
+            # A plan ingested as several chunks is listed once, at its best-ranked chunk
+            seen = set()
+            for item_id, score in fused:
+                position = lexical_index.positions.get(item_id)
+                if position is None:
+                    continue
+                plan = lexical_index.metadatas[position].get("source", item_id)
+                if plan not in seen:
+                    seen.add(plan)
+                    yield plan, item_id, position, score
+
+        n_candidates = min(max(top_k * CANDIDATES_PER_RESULT, MIN_CANDIDATES), len(lexical_index))
+        if n_candidates == 0:
+            return []
+        dense = self.collection.query(
+            query_embeddings=list(query_embeddings), n_results=n_candidates, where=where
+        )
+
+        rankings = []
+        distances: dict[str, float] = {}
+        # Plan -> indices of the queries that rank it among their own top_k plans
+        matched_queries: dict[str, list[int]] = {}
+        for query_index, query in enumerate(queries):
+            dense_ids = dense["ids"][query_index]
+            lexical_ids = [item_id for item_id, _ in lexical_index.search(query, n_candidates, where=where)]
+            rankings.extend([dense_ids, lexical_ids])
+            for item_id, distance in zip(dense_ids, dense["distances"][query_index]):
+                # Keep the distance to the closest query
+                distances[item_id] = min(distance, distances.get(item_id, distance))
+            # A query matches the plans it would return on its own, not its whole candidate pool
+            query_hits = best_chunks(reciprocal_rank_fusion([dense_ids, lexical_ids]))
+            for plan, *_ in itertools.islice(query_hits, top_k):
+                matched_queries.setdefault(plan, []).append(query_index)
+
+        hits = []
+        for plan, item_id, position, score in best_chunks(reciprocal_rank_fusion(rankings)):
+            hits.append({
+                "id": item_id,
+                "document": lexical_index.documents[position],
+                "metadata": lexical_index.metadatas[position],
+                "distance": distances.get(item_id),
+                "score": score,
+                "matched_queries": matched_queries.get(plan, []),
+            })
+            if len(hits) == top_k:
+                break
+        return hits
+
@@ -0,0 +1,249 @@
+import json
+import os
+import shutil
+import tempfile
+import threading
+import uuid
+from contextlib import contextmanager
+from typing import Callable, Hashable, Iterator
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process locks, see `_file_lock`
+    fcntl = None
+
+from lexical_index import matches_where
+
+# Candidates re-scored in float32 per requested result when searching the int8 copy
+RESCORE_FACTOR = 4
+# Rows of the int8 copy widened to float32 at a time, bounding temporary memory
+SCAN_BLOCK_ROWS = 8192
+# File inside the index directory naming the version directory to read
+CURRENT_FILE = "CURRENT"
+
+
+@contextmanager
+def _file_lock(path: str, exclusive: bool) -> Iterator[None]:
+    """Holds an advisory lock on `path` across processes, where the platform supports it."""
+    if fcntl is None:
+        yield
+        return
+    with open(path, "a") as f:
+        fcntl.flock(f, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+class NumpyVectorIndex:
+    """Exact vector search over a contiguous float32 matrix of unit-normalized embeddings.
+
+    The matrix (and an optional int8-quantized copy with per-row scales) is stored
+    as `.npy` files and memory-mapped, so several worker processes on one host share
+    a single copy through the page cache. Distances are squared L2, as in the
+    Chroma collection, which for unit vectors equals 2 - 2 * cosine similarity.
+    """
+
+    def __init__(self, ids, documents, metadatas, vectors, quantized=None, scales=None):
+        self.ids = list(ids)
+        self.documents = list(documents)
+        self.metadatas = [metadata or {} for metadata in metadatas]
+        self.vectors = vectors
+        self.quantized = quantized
+        self.scales = scales
+
+    @staticmethod
+    def _normalize(matrix) -> np.ndarray:
+        matrix = np.asarray(matrix, dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return matrix / norms
+
+    @classmethod
+    def from_collection(cls, collection, quantize: bool = True) -> "NumpyVectorIndex":
+        records = collection.get(include=["embeddings", "documents", "metadatas"])
+        if len(records["ids"]) == 0:
+            return cls([], [], [], np.zeros((0, 0), dtype=np.float32))
+        vectors = np.ascontiguousarray(cls._normalize(records["embeddings"]))
+        quantized = scales = None
+        if quantize and len(vectors):
+            scales = np.abs(vectors).max(axis=1) / 127.0
+            scales[scales == 0] = 1.0
+            quantized = np.round(vectors / scales[:, None]).astype(np.int8)
+            scales = scales.astype(np.float32)
+        return cls(records["ids"], records["documents"], records["metadatas"], vectors, quantized, scales)
+
+    def save(self, path: str, version: Hashable = None) -> None:
+        """Writes the index to `path`, replacing any previous copy atomically.
+
+        Each save writes a new version directory inside `path` and then switches
+        the `CURRENT` pointer file to it with a single rename, so a concurrent
+        `load`, also from another process, sees either the old or the new copy.
+        Older versions are removed under an exclusive lock that `load` holds
+        shared while it opens the files.
+        """
+        os.makedirs(path, exist_ok=True)
+        staging = tempfile.mkdtemp(prefix=".staging-", dir=path)
+        np.save(os.path.join(staging, "vectors.npy"), self.vectors)
+        if self.quantized is not None:
+            np.save(os.path.join(staging, "quantized.npy"), self.quantized)
+            np.save(os.path.join(staging, "scales.npy"), self.scales)
+        with open(os.path.join(staging, "records.json"), "w", encoding="utf-8") as f:
+            json.dump({
+                "ids": self.ids,
+                "documents": self.documents,
+                "metadatas": self.metadatas,
+                "version": list(version) if isinstance(version, tuple) else version,
+            }, f)
+        name = f"v-{uuid.uuid4().hex}"
+        pointer = os.path.join(path, f".{CURRENT_FILE}-{name}")
+        with open(pointer, "w", encoding="utf-8") as f:
+            f.write(name)
+        with _file_lock(f"{path}.lock", exclusive=True):
+            os.rename(staging, os.path.join(path, name))
+            os.replace(pointer, os.path.join(path, CURRENT_FILE))
+            # Mapped files stay readable after removal, so only loads still opening files need the lock
+            for entry in os.scandir(path):
+                if entry.name in (name, CURRENT_FILE) or entry.name.startswith(".staging-"):
+                    continue
+                if entry.is_dir():
+                    shutil.rmtree(entry.path, ignore_errors=True)
+                elif not entry.name.startswith(f".{CURRENT_FILE}-"):
+                    # Files of the single-directory layout used before versioning
+                    os.remove(entry.path)
+
+    @staticmethod
+    def exists(path: str) -> bool:
+        return os.path.exists(os.path.join(path, CURRENT_FILE))
+
+    @classmethod
+    def load(cls, path: str) -> tuple["NumpyVectorIndex", Hashable]:
+        """Memory-maps a saved index and returns it with the version it was built from."""
+        with _file_lock(f"{path}.lock", exclusive=False):
+            with open(os.path.join(path, CURRENT_FILE), "r", encoding="utf-8") as f:
+                return cls._load_version(os.path.join(path, f.read().strip()))
+
+    @classmethod
+    def _load_version(cls, path: str) -> tuple["NumpyVectorIndex", Hashable]:
+        with open(os.path.join(path, "records.json"), "r", encoding="utf-8") as f:
+            records = json.load(f)
+        vectors = np.load(os.path.join(path, "vectors.npy"), mmap_mode="r")
+        quantized = scales = None
+        if os.path.exists(os.path.join(path, "quantized.npy")):
+            quantized = np.load(os.path.join(path, "quantized.npy"), mmap_mode="r")
+            scales = np.load(os.path.join(path, "scales.npy"), mmap_mode="r")
+        version = records.get("version")
+        index = cls(records["ids"], records["documents"], records["metadatas"], vectors, quantized, scales)
+        return index, tuple(version) if isinstance(version, list) else version
+
+    def _mask(self, where: dict | None) -> np.ndarray | None:
+        if not where:
+            return None
+        return np.fromiter(
+            (matches_where(metadata, where) for metadata in self.metadatas), dtype=bool, count=len(self.ids)
+        )
+
+    def search(self, query_embeddings, n_results: int, where: dict | None = None, use_quantized: bool = True):
+        """Returns (positions, distances) arrays of shape (queries, <= n_results), best first."""
+        queries = self._normalize(np.atleast_2d(query_embeddings))
+        mask = self._mask(where)
+        candidates = np.arange(len(self.ids)) if mask is None else np.flatnonzero(mask)
+        k = min(n_results, len(candidates))
+        if k == 0:
+            empty = np.empty((len(queries), 0))
+            return empty.astype(np.int64), empty
+
+        if use_quantized and self.quantized is not None:
+            # Coarse scores from the int8 copy, then exact re-scoring of the best few
+            quantized = self.quantized if mask is None else self.quantized[candidates]
+            scales = self.scales if mask is None else self.scales[candidates]
+            coarse = np.empty((len(queries), len(candidates)), dtype=np.float32)
+            for start in range(0, len(candidates), SCAN_BLOCK_ROWS):
+                block = np.asarray(quantized[start:start + SCAN_BLOCK_ROWS], dtype=np.float32)
+                coarse[:, start:start + len(block)] = (queries @ block.T) * scales[start:start + len(block)]
+            shortlist = min(len(candidates), k * RESCORE_FACTOR)
+            top = np.argpartition(-coarse, shortlist - 1, axis=1)[:, :shortlist]
+            positions = candidates[top]
+            # Only the shortlisted float32 rows are read from the memory map
+            shortlisted = np.asarray(self.vectors[positions.ravel()]).reshape(*positions.shape, -1)
+            similarities = np.einsum("qd,qkd->qk", queries, shortlisted)
+        else:
+            matrix = self.vectors if mask is None else self.vectors[candidates]
+            similarities = queries @ matrix.T
+            positions = np.broadcast_to(candidates, similarities.shape)
+
+        top = np.argpartition(-similarities, k - 1, axis=1)[:, :k]
+        top_similarities = np.take_along_axis(similarities, top, axis=1)
+        order = np.argsort(-top_similarities, axis=1)
+        best = np.take_along_axis(top, order, axis=1)
+        return np.take_along_axis(positions, best, axis=1), 2.0 - 2.0 * np.take_along_axis(top_similarities, order, axis=1)
+
+
+class NumpyCollection:
+    """Chroma-compatible `query`/`get`/`count` facade over a memory-mapped NumpyVectorIndex.
+
+    The index is built from the Chroma collection the first time and whenever
+    `fingerprint()` changes; otherwise the saved copy at `path` is reused. Only
+    one process rebuilds a stale copy at a time; the others wait and load it.
+    `fingerprint()` is called on every query, so pass a ThrottledFingerprint
+    rather than a function that walks the database directory.
+    """
+
+    def __init__(
+        self,
+        source_collection,
+        path: str,
+        fingerprint: Callable[[], Hashable],
+        quantize: bool = True,
+    ):
+        self.source_collection = source_collection
+        self.path = path
+        self.fingerprint = fingerprint
+        self.quantize = quantize
+        self._index: NumpyVectorIndex | None = None
+        self._version = None
+        self._lock = threading.Lock()
+
+    def index(self) -> NumpyVectorIndex:
+        version = self.fingerprint()
+        with self._lock:
+            if self._index is not None and version == self._version:
+                return self._index
+            with _file_lock(f"{self.path}.build.lock", exclusive=True):
+                # Another process may have rebuilt it while this one waited for the lock
+                if NumpyVectorIndex.exists(self.path):
+                    index, saved_version = NumpyVectorIndex.load(self.path)
+                    if saved_version == version:
+                        self._index, self._version = index, version
+                        return index
+                index = NumpyVectorIndex.from_collection(self.source_collection, quantize=self.quantize)
+                index.save(self.path, version)
+            # Serve from the memory-mapped copy so worker processes share the pages
+            self._index, self._version = NumpyVectorIndex.load(self.path)[0], version
+            return self._index
+
+    def count(self) -> int:
+        return len(self.index().ids)
+
+    def get(self, include=None, **kwargs) -> dict:
+        index = self.index()
+        return {"ids": index.ids, "documents": index.documents, "metadatas": index.metadatas}
+
+    def query(self, query_embeddings, n_results: int = 10, where: dict | None = None, **kwargs) -> dict:
+        index = self.index()
+        positions, distances = index.search(query_embeddings, n_results, where=where)
+        return {
+            "ids": [[index.ids[position] for position in row] for row in positions],
+            "distances": [[float(distance) for distance in row] for row in distances],
+        }
+
+    def stats(self) -> dict:
+        index = self.index()
+        return {
+            "rows": len(index.ids),
+            "vector_bytes": int(index.vectors.nbytes),
+            "quantized_bytes": int(index.quantized.nbytes + index.scales.nbytes) if index.quantized is not None else 0,
+        }
@@ -1,31 +1,42 @@
 import asyncio
+import importlib.util
 import json
 import logging
+import time
+import weakref
+from dataclasses import dataclass
 from typing import AsyncGenerator, Dict, Optional, Any
 from uuid import uuid4
 
 import httpx
-from pydantic import Field
+from pydantic import Field, PrivateAttr
 
 # A2A Python SDK Imports
-from a2a.client import A2AClient
+from a2a.client import A2ACardResolver, A2AClient, A2AClientHTTPError, A2AClientJSONError
 from a2a.types import (
     AgentCard,
     DataPart,
     JSONRPCErrorResponse,
     Message,
     MessageSendParams,
+    Part,
     SendMessageRequest,
     SendMessageResponse,
     SendMessageSuccessResponse,
+    SendStreamingMessageRequest,
+    SendStreamingMessageSuccessResponse,
     Task,
+    TaskArtifactUpdateEvent,
     TaskState,
+    TaskStatusUpdateEvent,
     TextPart,
+    UnsupportedOperationError,
 )
 
 # Google ADK Imports
 from google.adk.agents import BaseAgent
 from google.adk.agents.invocation_context import InvocationContext
+from google.adk.agents.run_config import StreamingMode
 from google.adk.events.event import Event
 from google.genai import types as genai_types
 
@@ -33,15 +44,51 @@ from google.genai import types as genai_types
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+@dataclass
+class _LoopResources:
+    """The pooled client of one event loop, and the lock its turns take to resolve the AgentCard."""
+
+    client: httpx.AsyncClient
+    card_lock: asyncio.Lock
+
+
+@dataclass
+class _CardEntry:
+    """A resolved AgentCard, when it expires, and what was learned about the server while it was cached."""
+
+    card: AgentCard
+    expires_at: float
+    # Set when the server turns out not to stream despite its card
+    streaming_unsupported: bool = False
+
+
+class StreamingUnsupportedError(Exception):
+    """Raised before anything is yielded when the A2A server cannot stream a reply."""
+
+
+# HTTP/2 needs the optional h2 package (pip install 'httpx[http2]')
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
 
 class AdkToA2AClientAdapter(BaseAgent):
     """
     An ADK BaseAgent that acts as a client to an external A2A server.
 
     This version includes the required 'name' and 'description' fields for
-    BaseAgent and creates a new httpx.AsyncClient for each request to ensure
-
-    connection stability and prevent async lifecycle errors.
+    BaseAgent. Requests go through a long-lived, pooled httpx.AsyncClient so
+    connections are kept alive between turns. An httpx client is bound to the
+    event loop it was first used on, so one client is kept per running loop and
+    dropped together with its loop.
+
+    The remote AgentCard is resolved once and reused for `agent_card_ttl_seconds`.
+    A failed request discards it so the next turn resolves it again. A server that
+    advertises streaming but cannot stream is sent `message/send` until the card
+    is resolved again.
+
+    When the card advertises streaming, replies are read from `message/stream`:
+    progress updates and report chunks are yielded as partial events while they
+    arrive (in SSE streaming mode), followed by one final event with the complete
+    reply. Servers that cannot stream are sent `message/send` instead.
     """
 
     # Pydantic Field Declarations
@@ -53,6 +100,20 @@ class AdkToA2AClientAdapter(BaseAgent):
     a2a_server_url: str
     session_map: Dict[str, Dict[str, str]] = Field(default_factory=dict)
 
+    # Connection pool settings
+    http2: bool = False
+    max_connections: int = 20
+    max_keepalive_connections: int = 10
+    keepalive_expiry_seconds: float = 30.0
+    connect_timeout_seconds: float = 10.0
+    agent_card_ttl_seconds: float = 300.0
+
+    # asyncio objects are bound to the loop they are used on, so each loop gets its own
+    _loop_resources: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, _LoopResources]" = PrivateAttr(
+        default_factory=weakref.WeakKeyDictionary
+    )
+    _card_entry: Optional[_CardEntry] = PrivateAttr(default=None)
+
     def _init_(self, **data: Any):
         """
         Initializes the agent.
@@ -68,6 +129,63 @@ class AdkToA2AClientAdapter(BaseAgent):
         )
 
 
+    def _get_loop_resources(self) -> _LoopResources:
+        """Returns the pooled client and card lock of the running event loop, creating them on first use."""
+        loop = asyncio.get_running_loop()
+        resources = self._loop_resources.get(loop)
+        if resources is None or resources.client.is_closed:
+            http2 = self.http2 and HTTP2_AVAILABLE
+            if self.http2 and not HTTP2_AVAILABLE:
+                logger.warning(f"[{self.name}] HTTP/2 requested but h2 is not installed; using HTTP/1.1.")
+            client = httpx.AsyncClient(
+                # Reports take a while to generate, so only connecting is time-limited
+                timeout=httpx.Timeout(None, connect=self.connect_timeout_seconds),
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_keepalive_connections,
+                    keepalive_expiry=self.keepalive_expiry_seconds,
+                ),
+                http2=http2,
+            )
+            resources = self._loop_resources[loop] = _LoopResources(client, asyncio.Lock())
+            logger.info(f"[{self.name}] Created pooled HTTP client (http2={http2}).")
+        return resources
+
+    def _fresh_card_entry(self) -> Optional[_CardEntry]:
+        entry = self._card_entry
+        if entry is not None and time.monotonic() < entry.expires_at:
+            return entry
+        return None
+
+    async def _get_card_entry(self, resources: _LoopResources) -> _CardEntry:
+        """Returns the cached AgentCard entry, resolving the card again once it has expired.
+
+        A new entry starts out assuming the server streams as its card says.
+        """
+        entry = self._fresh_card_entry()
+        if entry is not None:
+            return entry
+        async with resources.card_lock:
+            # Another turn may have resolved it while this one waited
+            entry = self._fresh_card_entry()
+            if entry is None:
+                logger.info(f"[{self.name}] Resolving agent card from {self.a2a_server_url}.")
+                card = await A2ACardResolver(
+                    httpx_client=resources.client, base_url=self.a2a_server_url
+                ).get_agent_card()
+                entry = self._card_entry = _CardEntry(card, time.monotonic() + self.agent_card_ttl_seconds)
+            return entry
+
+    def invalidate_agent_card(self) -> None:
+        """Forgets the cached AgentCard so the next turn resolves it again."""
+        self._card_entry = None
+
+    async def aclose(self) -> None:
+        """Closes the pooled client of the running event loop."""
+        resources = self._loop_resources.pop(asyncio.get_running_loop(), None)
+        if resources is not None:
+            await resources.client.aclose()
+
     async def _run_async_impl(
         self,
         context: InvocationContext,
@@ -75,23 +193,19 @@ class AdkToA2AClientAdapter(BaseAgent):
         """
         The core logic for the agent, required by BaseAgent.
 
-        For each invocation, this method creates, uses, and discards a new client.
+        Each invocation reuses the pooled client and the cached AgentCard.
         """
-        # Create a new, short-lived client for this specific request
         try:
-            async with httpx.AsyncClient(timeout=None) as client:
-                # Initialize the A2A client using the new httpx client
-                logger.info(f"[{self.name}] Creating new A2A client for request.")
-                resolver = A2AClient.get_client_from_agent_card_url(
-                    httpx_client=client, base_url=self.a2a_server_url
-                )
-                a2a_client = await resolver
-                logger.info(f"[{self.name}] New A2A client created successfully.")
-
-                async for event in self._handle_request(context, a2a_client):
-                    yield event
+            resources = self._get_loop_resources()
+            card_entry = await self._get_card_entry(resources)
+            a2a_client = A2AClient(httpx_client=resources.client, agent_card=card_entry.card)
 
-        except httpx.RequestError as e:
+            async for event in self._handle_request(context, a2a_client, card_entry):
+                yield event
+
+        except (httpx.RequestError, A2AClientHTTPError, A2AClientJSONError) as e:
+            # The server may have moved or changed its card, so resolve it again next time
+            self.invalidate_agent_card()
             logger.error(f"[{self.name}] HTTP request failed: {e}")
             error_text = f"Failed to connect to the remote agent at {self.a2a_server_url}."
             yield Event(
@@ -117,7 +231,8 @@ class AdkToA2AClientAdapter(BaseAgent):
     async def _handle_request(
         self,
         context: InvocationContext,
-        a2a_client: A2AClient
+        a2a_client: A2AClient,
+        card_entry: _CardEntry,
     ) -> AsyncGenerator[Event, None]:
         """
         Handles the logic of a single request using the provided A2A client.
@@ -157,8 +272,149 @@ class AdkToA2AClientAdapter(BaseAgent):
             contextId=context_id,
             kind="message",
         )
-
         params = MessageSendParams(message=a2a_message_to_send)
+
+        if card_entry.card.capabilities.streaming and not card_entry.streaming_unsupported:
+            try:
+                async for event in self._stream_message(context, a2a_client, params):
+                    yield event
+                return
+            except StreamingUnsupportedError as e:
+                logger.warning(f"[{self.name}] Streaming unavailable, using message/send: {e}")
+                card_entry.streaming_unsupported = True
+
+        async for event in self._send_message(context, a2a_client, params):
+            yield event
+
+    async def _stream_message(
+        self,
+        context: InvocationContext,
+        a2a_client: A2AClient,
+        params: MessageSendParams,
+    ) -> AsyncGenerator[Event, None]:
+        """
+        Sends the message with message/stream and converts the reply as it arrives.
+
+        Status updates and report chunks become partial events, and the complete
+        reply is yielded as one final event once the task stops. Raises
+        StreamingUnsupportedError if the server rejects streaming before replying.
+        """
+        session_id = context.session.id
+        request = SendStreamingMessageRequest(
+            id=uuid4().hex, method="message/stream", params=params
+        )
+        logger.info(
+            f"[{self.name}] Streaming A2A request for session {session_id}:\n"
+            f"{request.model_dump_json(indent=2, exclude_none=True)}"
+        )
+        # Partial events are only yielded to runners reading an SSE stream, as for LLM agents
+        yield_partials = (
+            context.run_config is not None
+            and context.run_config.streaming_mode == StreamingMode.SSE
+        )
+
+        received_any = False
+        # Report parts so far, per artifact, with appended chunks merged in
+        artifacts: Dict[str, list[Part]] = {}
+        content_to_yield: Optional[genai_types.Content] = None
+
+        try:
+            async for response_wrapper in a2a_client.send_message_streaming(request):
+                response = response_wrapper.root
+                if not isinstance(response, SendStreamingMessageSuccessResponse):
+                    error = response.error
+                    if not received_any and error.code == UnsupportedOperationError().code:
+                        raise StreamingUnsupportedError(error.message)
+                    logger.error(
+                        f"[{self.name}] A2A server returned an error: "
+                        f"Code={error.code}, Message='{error.message}'"
+                    )
+                    error_text = f"Error communicating with remote agent: {error.message}"
+                    content_to_yield = genai_types.Content(parts=[genai_types.Part.from_text(text=error_text)])
+                    break
+                received_any = True
+                result = response.result
+
+                if isinstance(result, Message):
+                    content_to_yield = self._a2a_message_to_adk_content(result)
+                    break
+
+                # Update session mapping with new task/context IDs
+                if isinstance(result, Task):
+                    self.session_map[session_id] = {"taskId": result.id, "contextId": result.contextId}
+                    for artifact in result.artifacts or []:
+                        artifacts[artifact.artifactId] = list(artifact.parts)
+                    status = result.status
+                    is_final = status.state in (
+                        TaskState.completed, TaskState.input_required, TaskState.failed,
+                        TaskState.canceled, TaskState.rejected,
+                    )
+                else:
+                    self.session_map[session_id] = {"taskId": result.taskId, "contextId": result.contextId}
+
+                if isinstance(result, TaskArtifactUpdateEvent):
+                    artifact = result.artifact
+                    if result.append:
+                        artifacts.setdefault(artifact.artifactId, []).extend(artifact.parts)
+                    else:
+                        artifacts[artifact.artifactId] = list(artifact.parts)
+                    # A closing chunk that replaces the artifact repeats text already shown
+                    is_replacement = result.lastChunk and not result.append
+                    if yield_partials and not is_replacement:
+                        chunk = self._a2a_parts_to_adk_content(artifact.parts)
+                        if chunk:
+                            yield self._partial_event(context, chunk)
+                    continue
+
+                if isinstance(result, TaskStatusUpdateEvent):
+                    status = result.status
+                    is_final = result.final
+
+                if not is_final:
+                    if yield_partials:
+                        update = self._a2a_message_to_adk_content(status.message)
+                        if update:
+                            yield self._partial_event(context, update)
+                    continue
+
+                if status.state == TaskState.completed and artifacts:
+                    content_to_yield = self._a2a_parts_to_adk_content(
+                        [part for parts in artifacts.values() for part in parts]
+                    )
+                else:
+                    content_to_yield = self._a2a_message_to_adk_content(status.message)
+                break
+
+        except A2AClientHTTPError as e:
+            # A server without streaming answers with plain JSON rather than SSE
+            if not received_any and e.status_code == 400:
+                raise StreamingUnsupportedError(e.message) from e
+            raise
+
+        if content_to_yield is None and artifacts:
+            # The stream ended without a final status; return the report received so far
+            content_to_yield = self._a2a_parts_to_adk_content(
+                [part for parts in artifacts.values() for part in parts]
+            )
+
+        logger.info(f"[{self.name}] A2A stream finished for session {session_id}.")
+
+        # Yield Final Event to ADK Runner
+        yield Event(
+            invocation_id=context.invocation_id,
+            author=self.name,
+            branch=context.branch,
+            content=content_to_yield,
+        )
+
+    async def _send_message(
+        self,
+        context: InvocationContext,
+        a2a_client: A2AClient,
+        params: MessageSendParams,
+    ) -> AsyncGenerator[Event, None]:
+        """Sends the message with message/send and yields the complete reply once it is ready."""
+        session_id = context.session.id
         request = SendMessageRequest(
             id=uuid4().hex, method="message/send", params=params
         )
@@ -192,6 +448,11 @@ class AdkToA2AClientAdapter(BaseAgent):
                     )
                 elif result.artifacts:
                     content_to_yield = self._a2a_task_to_adk_content(result)
+                else:
+                    # Rejected, failed or canceled: the status message says why
+                    content_to_yield = self._a2a_message_to_adk_content(
+                        result.status.message
+                    )
 
             elif isinstance(result, Message):
                 content_to_yield = self._a2a_message_to_adk_content(result)
@@ -213,14 +474,22 @@ class AdkToA2AClientAdapter(BaseAgent):
             content=content_to_yield,
         )
 
-    def _a2a_message_to_adk_content(
-        self, a2a_msg: Optional[Message]
-    ) -> Optional[genai_types.Content]:
-        if not a2a_msg or not a2a_msg.parts:
-            return None
+    def _partial_event(
+        self, context: InvocationContext, content: genai_types.Content
+    ) -> Event:
+        return Event(
+            invocation_id=context.invocation_id,
+            author=self.name,
+            branch=context.branch,
+            content=content,
+            partial=True,
+        )
 
+    def _a2a_parts_to_adk_content(
+        self, parts: list[Part]
+    ) -> Optional[genai_types.Content]:
         adk_parts = []
-        for part_wrapper in a2a_msg.parts:
+        for part_wrapper in parts:
             part = part_wrapper.root
             if isinstance(part, DataPart):
                 adk_parts.append(genai_types.Part.from_text(text=json.dumps(part.data)))
@@ -229,19 +498,20 @@ class AdkToA2AClientAdapter(BaseAgent):
 
         return genai_types.Content(parts=adk_parts) if adk_parts else None
 
+    def _a2a_message_to_adk_content(
+        self, a2a_msg: Optional[Message]
+    ) -> Optional[genai_types.Content]:
+        if not a2a_msg or not a2a_msg.parts:
+            return None
+
+        return self._a2a_parts_to_adk_content(a2a_msg.parts)
+
     def _a2a_task_to_adk_content(
         self, task: Task
     ) -> Optional[genai_types.Content]:
         if not task.artifacts:
             return None
 
-        all_parts = []
-        for artifact in task.artifacts:
-            for part_wrapper in artifact.parts:
-                part = part_wrapper.root
-                if isinstance(part, DataPart):
-                    all_parts.append(genai_types.Part.from_text(text=json.dumps(part.data)))
-                elif isinstance(part, TextPart) and part.text:
-                    all_parts.append(genai_types.Part.from_text(text=part.text))
-
-        return genai_types.Content(parts=all_parts) if all_parts else None
\ No newline at end of file
+        return self._a2a_parts_to_adk_content(
+            [part for artifact in task.artifacts for part in artifact.parts]
+        )
@@ -6,7 +6,7 @@ from google.adk.tools.mcp_tool.mcp_toolset import MCPToolset
 from google.genai import types
 from pydantic import BaseModel, Field
 
-from a2a_to_adk_adapter import AdkToA2AClientAdapter
+from .a2a_to_adk_adapter import AdkToA2AClientAdapter
 
 async def save_report_in_state(callback_context: CallbackContext):
     """